@@ -8,7 +8,9 @@ This module provides:
 """
 
 import re
-from typing import Any, Dict, List, Optional, Tuple
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Tuple
 
 
 # ---------------------------------------------------------------------------
@@ -18,92 +20,47 @@ from typing import Any, Dict, List, Optional, Tuple
 # Fields follow APA 7 conventions.
 # ---------------------------------------------------------------------------
 
+# Shared bibliographic data for books cited chapter by chapter.  Entries
+# below extend these with their own pattern and chapter, so every chapter of
+# a book shares the same author/title/publisher string objects.
+_SOMMERVILLE_SE: Dict[str, Any] = {
+    "author": "Sommerville, I.",
+    "year": 2015,
+    "title": "Software Engineering",
+    "edition": "10th",
+    "publisher": "Pearson Education",
+    "isbn": "9781292096131",
+    "publication_type": "book",
+}
+
+_COHN_USER_STORIES: Dict[str, Any] = {
+    "author": "Cohn, M.",
+    "year": 2004,
+    "title": "User Stories Applied: For Agile Software Development",
+    "publisher": "Addison-Wesley Professional",
+    "isbn": "9780321205681",
+    "publication_type": "book",
+}
+
+_CRISPIN_GREGORY_AGILE_TESTING: Dict[str, Any] = {
+    "author": "Crispin, L., & Gregory, J.",
+    "year": 2008,
+    "title": "Agile Testing: A Practical Guide for Testers and Agile Teams",
+    "publisher": "Addison-Wesley Professional",
+    "isbn": "9780321534460",
+    "publication_type": "book",
+}
+
 CITATION_REGISTRY: List[Dict[str, Any]] = [
     # --- Books / book chapters ---
-    {
-        "pattern": r"(?i)sommerville.*chapter\s*1\b",
-        "author": "Sommerville, I.",
-        "year": 2015,
-        "title": "Software Engineering",
-        "chapter": "1",
-        "edition": "10th",
-        "publisher": "Pearson Education",
-        "isbn": "9781292096131",
-        "publication_type": "book",
-    },
-    {
-        "pattern": r"(?i)sommerville.*chapter\s*2\b",
-        "author": "Sommerville, I.",
-        "year": 2015,
-        "title": "Software Engineering",
-        "chapter": "2",
-        "edition": "10th",
-        "publisher": "Pearson Education",
-        "isbn": "9781292096131",
-        "publication_type": "book",
-    },
-    {
-        "pattern": r"(?i)sommerville.*chapter\s*3\b",
-        "author": "Sommerville, I.",
-        "year": 2015,
-        "title": "Software Engineering",
-        "chapter": "3",
-        "edition": "10th",
-        "publisher": "Pearson Education",
-        "isbn": "9781292096131",
-        "publication_type": "book",
-    },
-    {
-        "pattern": r"(?i)sommerville.*chapter\s*6",
-        "author": "Sommerville, I.",
-        "year": 2015,
-        "title": "Software Engineering",
-        "chapter": "6",
-        "edition": "10th",
-        "publisher": "Pearson Education",
-        "isbn": "9781292096131",
-        "publication_type": "book",
-    },
-    {
-        "pattern": r"(?i)cohn.*chapter\s*1\b",
-        "author": "Cohn, M.",
-        "year": 2004,
-        "title": "User Stories Applied: For Agile Software Development",
-        "chapter": "1",
-        "publisher": "Addison-Wesley Professional",
-        "isbn": "9780321205681",
-        "publication_type": "book",
-    },
-    {
-        "pattern": r"(?i)cohn.*chapter\s*2\b",
-        "author": "Cohn, M.",
-        "year": 2004,
-        "title": "User Stories Applied: For Agile Software Development",
-        "chapter": "2",
-        "publisher": "Addison-Wesley Professional",
-        "isbn": "9780321205681",
-        "publication_type": "book",
-    },
-    {
-        "pattern": r"(?i)crispin.*gregory.*chapter\s*6\b",
-        "author": "Crispin, L., & Gregory, J.",
-        "year": 2008,
-        "title": "Agile Testing: A Practical Guide for Testers and Agile Teams",
-        "chapter": "6",
-        "publisher": "Addison-Wesley Professional",
-        "isbn": "9780321534460",
-        "publication_type": "book",
-    },
-    {
-        "pattern": r"(?i)crispin.*gregory.*chapter\s*10\b",
-        "author": "Crispin, L., & Gregory, J.",
-        "year": 2008,
-        "title": "Agile Testing: A Practical Guide for Testers and Agile Teams",
-        "chapter": "10",
-        "publisher": "Addison-Wesley Professional",
-        "isbn": "9780321534460",
-        "publication_type": "book",
-    },
+    {"pattern": r"(?i)sommerville.*chapter\s*1\b", **_SOMMERVILLE_SE, "chapter": "1"},
+    {"pattern": r"(?i)sommerville.*chapter\s*2\b", **_SOMMERVILLE_SE, "chapter": "2"},
+    {"pattern": r"(?i)sommerville.*chapter\s*3\b", **_SOMMERVILLE_SE, "chapter": "3"},
+    {"pattern": r"(?i)sommerville.*chapter\s*6", **_SOMMERVILLE_SE, "chapter": "6"},
+    {"pattern": r"(?i)cohn.*chapter\s*1\b", **_COHN_USER_STORIES, "chapter": "1"},
+    {"pattern": r"(?i)cohn.*chapter\s*2\b", **_COHN_USER_STORIES, "chapter": "2"},
+    {"pattern": r"(?i)crispin.*gregory.*chapter\s*6\b", **_CRISPIN_GREGORY_AGILE_TESTING, "chapter": "6"},
+    {"pattern": r"(?i)crispin.*gregory.*chapter\s*10\b", **_CRISPIN_GREGORY_AGILE_TESTING, "chapter": "10"},
     {
         "pattern": r"(?i)kanban\s+and\s+scrum",
         "author": "Kniberg, H., & Skarin, M.",
@@ -203,16 +160,67 @@ CITATION_REGISTRY: List[Dict[str, Any]] = [
 ]
 
 
+# ---------------------------------------------------------------------------
+# Compiled lookup
+# ---------------------------------------------------------------------------
+# All registry patterns are folded into a single alternation compiled once at
+# import, so a lookup is one regex call instead of one per entry.  Each
+# alternative is anchored with a lazy ``.*?`` prefix and tried via
+# ``match()``: the engine only falls through to entry *i + 1* once entry *i*
+# cannot match anywhere in the filename, which keeps the registry's
+# first-entry-wins semantics.  Leading global flags such as ``(?i)`` are
+# rewritten as scoped groups so they stay local to their own entry.
+# ---------------------------------------------------------------------------
+
+_GLOBAL_FLAGS_RE = re.compile(r"^\(\?([aiLmsux]+)\)")
+
+
+def _scoped_pattern(pattern: str) -> str:
+    """Rewrite a leading ``(?flags)`` prefix as a scoped ``(?flags:...)`` group."""
+    m = _GLOBAL_FLAGS_RE.match(pattern)
+    if m:
+        return f"(?{m.group(1)}:{pattern[m.end():]})"
+    return f"(?:{pattern})"
+
+
+_REGISTRY_RE = re.compile(
+    "|".join(
+        f"(?P<e{i}>(?s:.*?){_scoped_pattern(entry['pattern'])})"
+        for i, entry in enumerate(CITATION_REGISTRY)
+    )
+)
+
+# Read-only registry entries with the ``pattern`` key already stripped,
+# indexed by group number.
+_ENTRIES: Tuple[Mapping[str, Any], ...] = tuple(
+    MappingProxyType({k: v for k, v in entry.items() if k != "pattern"})
+    for entry in CITATION_REGISTRY
+)
+
+
+@lru_cache(maxsize=1024)
+def _lookup_citation_cached(filename: str) -> Optional[Mapping[str, Any]]:
+    """Match *filename* against the registry, memoised per filename.
+
+    Ingestion enriches every page/chunk of a file with the same filename, so
+    the regex only needs to run once per unique file.
+    """
+    m = _REGISTRY_RE.match(filename)
+    if m is None:
+        return None
+    return _ENTRIES[int(m.lastgroup[1:])]
+
+
 def lookup_citation(filename: str) -> Optional[Dict[str, Any]]:
     """Look up citation metadata for a given filename.
 
     Returns the first matching registry entry, or ``None`` if no match.
     """
-    for entry in CITATION_REGISTRY:
-        if re.search(entry["pattern"], filename):
-            # Return a copy without the regex pattern
-            return {k: v for k, v in entry.items() if k != "pattern"}
-    return None
+    entry = _lookup_citation_cached(filename)
+    if entry is None:
+        return None
+    # Return a copy so callers can't mutate the registry
+    return dict(entry)
 
 
 def enrich_metadata(metadata: Dict[str, Any], filename: str) -> Dict[str, Any]:
@@ -221,13 +229,16 @@ def enrich_metadata(metadata: Dict[str, Any], filename: str) -> Dict[str, Any]:
     Registry values are added *only* for keys that are not already set in
     ``metadata``, so explicit values always take precedence.
     """
-    citation = lookup_citation(filename)
+    # Values are only read here, so use the cached read-only entry directly
+    # rather than the defensive copy lookup_citation() makes.
+    citation = _lookup_citation_cached(filename)
     if citation is None:
         return metadata
 
-    for key, value in citation.items():
-        if key not in metadata or metadata[key] is None:
-            metadata[key] = value
+    # Missing and None keys are both treated as unset
+    overlay = {k: v for k, v in citation.items() if metadata.get(k) is None}
+    if overlay:
+        metadata.update(overlay)
 
     return metadata
 
@@ -241,25 +252,11 @@ def format_apa_inline(metadata: Dict[str, Any]) -> str:
 
     Falls back to the title or source if author/year are unavailable.
     """
-    author_raw = metadata.get("author", "")
     year = metadata.get("year")
     chapter = metadata.get("chapter")
     page_number = metadata.get("page_number")
 
-    if author_raw:
-        # Extract the first surname for in-text use
-        # Handles "Surname, I." and "Surname, I., & Surname2, J."
-        surnames = _extract_surnames(author_raw)
-        if len(surnames) == 1:
-            author_part = surnames[0]
-        elif len(surnames) == 2:
-            author_part = f"{surnames[0]} & {surnames[1]}"
-        else:
-            author_part = f"{surnames[0]} et al."
-    else:
-        author_part = metadata.get("title") or metadata.get("source") or "Unknown"
-
-    parts = [author_part]
+    parts = [_author_label(metadata)]
     if year:
         parts.append(str(year))
     if chapter:
@@ -276,46 +273,61 @@ def format_apa_reference(metadata: Dict[str, Any]) -> str:
     Supports books (with optional edition/chapter) and journal articles.
     """
     pub_type = metadata.get("publication_type", "other")
-    author = metadata.get("author", "Unknown")
-    year = metadata.get("year", "n.d.")
-    title = metadata.get("title", "Untitled")
+    formatter = _REFERENCE_FORMATTERS.get(pub_type, _format_book_reference)
+    return formatter(metadata)
+
+
+def _format_journal_reference(metadata: Dict[str, Any]) -> str:
+    """APA 7 reference for a journal article."""
+    journal = metadata.get("journal", "")
+    doi = metadata.get("doi", "")
 
-    if pub_type == "journal":
-        journal = metadata.get("journal", "")
+    parts = [
+        f"{metadata.get('author', 'Unknown')} ({metadata.get('year', 'n.d.')}). "
+        f"{metadata.get('title', 'Untitled')}. "
+    ]
+    if journal:
         volume = metadata.get("volume", "")
         issue = metadata.get("issue", "")
         pages = metadata.get("pages", "")
-        doi = metadata.get("doi", "")
-
-        ref = f"{author} ({year}). {title}. "
-        if journal:
-            ref += f"*{journal}*"
-            if volume:
-                ref += f", *{volume}*"
-            if issue:
-                ref += f"({issue})"
-            if pages:
-                ref += f", {pages}"
-            ref += "."
-        if doi:
-            ref += f" https://doi.org/{doi}"
-        return ref
-
-    # Default: book
-    publisher = metadata.get("publisher", "")
+        parts.append(f"*{journal}*")
+        if volume:
+            parts.append(f", *{volume}*")
+        if issue:
+            parts.append(f"({issue})")
+        if pages:
+            parts.append(f", {pages}")
+        parts.append(".")
+    if doi:
+        parts.append(f" https://doi.org/{doi}")
+    return "".join(parts)
+
+
+def _format_book_reference(metadata: Dict[str, Any]) -> str:
+    """APA 7 reference for a book; also the fallback for other types."""
     edition = metadata.get("edition", "")
+    publisher = metadata.get("publisher", "")
     isbn = metadata.get("isbn", "")
 
-    title_part = f"*{title}*"
+    parts = [
+        f"{metadata.get('author', 'Unknown')} ({metadata.get('year', 'n.d.')}). "
+        f"*{metadata.get('title', 'Untitled')}*"
+    ]
     if edition:
-        title_part += f" ({edition} ed.)"
-
-    ref = f"{author} ({year}). {title_part}."
+        parts.append(f" ({edition} ed.)")
+    parts.append(".")
     if publisher:
-        ref += f" {publisher}."
+        parts.append(f" {publisher}.")
     if isbn:
-        ref += f" ISBN: {isbn}."
-    return ref
+        parts.append(f" ISBN: {isbn}.")
+    return "".join(parts)
+
+
+# Reference formatters by publication_type; anything else is formatted as a book.
+_REFERENCE_FORMATTERS = {
+    "journal": _format_journal_reference,
+    "book": _format_book_reference,
+}
 
 
 def build_citation_key(metadata: Dict[str, Any]) -> str:
@@ -323,25 +335,36 @@ def build_citation_key(metadata: Dict[str, Any]) -> str:
 
     Used as a source identifier in the context passed to the LLM.
     """
-    author_raw = metadata.get("author", "")
     year = metadata.get("year")
 
-    if author_raw:
-        surnames = _extract_surnames(author_raw)
-        if len(surnames) == 1:
-            key = surnames[0]
-        elif len(surnames) == 2:
-            key = f"{surnames[0]} & {surnames[1]}"
-        else:
-            key = f"{surnames[0]} et al."
-    else:
-        key = metadata.get("title") or metadata.get("source") or "Unknown"
-
+    key = _author_label(metadata)
     if year:
         key += f", {year}"
     return key
 
 
+_INITIALS_RE = re.compile(r"^[A-Z]\.(\s*[A-Z]\.)*$")
+
+
+def _author_label(metadata: Dict[str, Any]) -> str:
+    """Return the in-text author label shared by citations and citation keys.
+
+    Handles "Surname, I." and "Surname, I., & Surname2, J."; three or more
+    authors collapse to "Surname et al.".  Falls back to the title or source
+    when no author is set.
+    """
+    author_raw = metadata.get("author", "")
+    if not author_raw:
+        return metadata.get("title") or metadata.get("source") or "Unknown"
+
+    surnames = _extract_surnames(author_raw)
+    if len(surnames) == 1:
+        return surnames[0]
+    if len(surnames) == 2:
+        return f"{surnames[0]} & {surnames[1]}"
+    return f"{surnames[0]} et al."
+
+
 def _extract_surnames(author_string: str) -> List[str]:
     """Extract surname(s) from an APA author string.
 
@@ -358,7 +381,9 @@ def _extract_surnames(author_string: str) -> List[str]:
     # Split by comma and iterate in pairs (surname, initials)
     parts = [p.strip() for p in cleaned.split(",") if p.strip()]
     for part in parts:
-        # A surname is a part that doesn't look like bare initials (e.g. "I." or "D. I. K.")
-        if not re.match(r'^[A-Z]\.(\s*[A-Z]\.)*$', part):
+        # A surname is a part that doesn't look like bare initials (e.g. "I." or "D. I. K.").
+        # Initials always have a dot second and last, so anything else is a
+        # surname without consulting the regex.
+        if part[1:2] != "." or part[-1] != "." or not _INITIALS_RE.match(part):
             surnames.append(part)
     return surnames if surnames else [author_string.strip()]
@@ -47,6 +47,10 @@ class Settings(BaseSettings):
     chunk_size_tokens: int = Field(512, env="CHUNK_SIZE_TOKENS")
     chunk_overlap_tokens: int = Field(50, env="CHUNK_OVERLAP_TOKENS")
     batch_size: int = Field(500, env="BATCH_SIZE")
+    max_concurrent_embeddings: int = Field(4, env="MAX_CONCURRENT_EMBEDDINGS")
+    embedding_rpm_limit: int = Field(3000, env="EMBEDDING_RPM_LIMIT")
+    embedding_tpm_limit: int = Field(1_000_000, env="EMBEDDING_TPM_LIMIT")
+    embedding_cache_path: Optional[str] = Field(None, env="EMBEDDING_CACHE_PATH")
     
     # Response Generation
     max_response_tokens: int = Field(1000, env="MAX_RESPONSE_TOKENS")
@@ -67,7 +71,7 @@ class Settings(BaseSettings):
         env_file_encoding = "utf-8"
         case_sensitive = False
         
-    @field_validator("qdrant_api_key", "redis_password", "anthropic_api_key", "cohere_api_key", "huggingface_api_key", mode="before")
+    @field_validator("qdrant_api_key", "redis_password", "anthropic_api_key", "cohere_api_key", "huggingface_api_key", "embedding_cache_path", mode="before")
     @classmethod
     def empty_str_to_none(cls, v):
         """Convert empty strings to None for optional fields."""
@@ -49,49 +49,7 @@ class DocumentStore:
         start_time = datetime.now()
         
         try:
-            # Generate document ID if not provided
-            if not document.id:
-                document.id = self._generate_document_id(document.content)
-            
-            # Create main document point
-            main_point = PointStruct(
-                id=document.id,
-                vector=embedding,
-                payload={
-                    "content": document.content,
-                    "metadata": document.metadata.model_dump(mode="json"),
-                    "document_type": "main",
-                    "created_at": datetime.now().isoformat(),
-                    "content_hash": self._hash_content(document.content),
-                    "token_count": len(document.content.split()),  # Rough estimate
-                }
-            )
-            
-            points_to_upsert = [main_point]
-            chunk_count = 0
-            
-            # Add chunk points if provided
-            if chunk_embeddings and document.chunks:
-                for i, (chunk, chunk_embedding) in enumerate(zip(document.chunks, chunk_embeddings)):
-                    chunk_id = str(uuid.uuid5(uuid.NAMESPACE_DNS, f"{document.id}_chunk_{i}"))
-                    payload = {
-                        "content": chunk,
-                        "metadata": document.metadata.model_dump(mode="json"),
-                        "document_type": "chunk",
-                        "parent_document_id": document.id,
-                        "chunk_index": i,
-                        "created_at": datetime.now().isoformat(),
-                        "content_hash": self._hash_content(chunk),
-                        "token_count": len(chunk.split()),
-                    }
-                    # Add per-chunk metadata (e.g. page_number for PDFs)
-                    if document.chunk_metadata and i < len(document.chunk_metadata):
-                        extra = document.chunk_metadata[i]
-                        if extra.get("page_number") is not None:
-                            payload["page_number"] = extra["page_number"]
-                    chunk_point = PointStruct(id=chunk_id, vector=chunk_embedding, payload=payload)
-                    points_to_upsert.append(chunk_point)
-                    chunk_count += 1
+            points_to_upsert, chunk_count = self._build_points(document, embedding, chunk_embeddings)
             
             # Upsert all points
             success = self.qdrant.upsert_points(points_to_upsert)
@@ -126,19 +84,120 @@ class DocumentStore:
                 processing_time=processing_time
             )
     
+    def _build_points(
+        self,
+        document: Document,
+        embedding: List[float],
+        chunk_embeddings: Optional[List[List[float]]] = None
+    ) -> tuple[List[PointStruct], int]:
+        """Build the main and chunk points for a document.
+
+        Assigns ``document.id`` if it is missing.  Returns
+        ``(points, chunk_count)``.
+        """
+        # Generate document ID if not provided
+        if not document.id:
+            document.id = self._generate_document_id(document.content)
+
+        # Create main document point
+        main_point = PointStruct(
+            id=document.id,
+            vector=embedding,
+            payload={
+                "content": document.content,
+                "metadata": document.metadata.model_dump(mode="json"),
+                "document_type": "main",
+                "created_at": datetime.now().isoformat(),
+                "content_hash": self._hash_content(document.content),
+                "token_count": len(document.content.split()),  # Rough estimate
+            }
+        )
+
+        points_to_upsert = [main_point]
+        chunk_count = 0
+
+        # Add chunk points if provided
+        if chunk_embeddings and document.chunks:
+            for i, (chunk, chunk_embedding) in enumerate(zip(document.chunks, chunk_embeddings)):
+                chunk_id = str(uuid.uuid5(uuid.NAMESPACE_DNS, f"{document.id}_chunk_{i}"))
+                payload = {
+                    "content": chunk,
+                    "metadata": document.metadata.model_dump(mode="json"),
+                    "document_type": "chunk",
+                    "parent_document_id": document.id,
+                    "chunk_index": i,
+                    "created_at": datetime.now().isoformat(),
+                    "content_hash": self._hash_content(chunk),
+                    "token_count": len(chunk.split()),
+                }
+                # Add per-chunk metadata (e.g. page_number for PDFs)
+                if document.chunk_metadata and i < len(document.chunk_metadata):
+                    extra = document.chunk_metadata[i]
+                    if extra.get("page_number") is not None:
+                        payload["page_number"] = extra["page_number"]
+                chunk_point = PointStruct(id=chunk_id, vector=chunk_embedding, payload=payload)
+                points_to_upsert.append(chunk_point)
+                chunk_count += 1
+        
+        return points_to_upsert, chunk_count
+    
     def ingest_documents_batch(
         self,
         documents: List[Document],
         embeddings: List[List[float]],
-        chunk_embeddings: Optional[List[List[List[float]]]] = None
+        chunk_embeddings: Optional[List[List[List[float]]]] = None,
+        wait: bool = True
     ) -> List[IngestionResult]:
-        """Ingest multiple documents in batch."""
-        results = []
+        """Ingest multiple documents with a single bulk upsert.
+
+        Points for every document are built first and written in one
+        upsert_points call, so the Qdrant round trips scale with the number
+        of points rather than the number of documents.  Documents whose
+        points can't be built fail individually; a failed upsert fails
+        every document in the batch.  ``wait`` is passed to upsert_points.
+        """
+        start_time = datetime.now()
+        results: List[Optional[IngestionResult]] = [None] * len(documents)
+        all_points: List[PointStruct] = []
+        built = []  # (index, chunk_count)
         
         for i, (document, embedding) in enumerate(zip(documents, embeddings)):
             chunk_emb = chunk_embeddings[i] if chunk_embeddings else None
-            result = self.ingest_document(document, embedding, chunk_emb)
-            results.append(result)
+            try:
+                points, chunk_count = self._build_points(document, embedding, chunk_emb)
+            except Exception as e:
+                self.logger.error(f"Error preparing document for ingestion: {e}")
+                results[i] = IngestionResult(
+                    success=False,
+                    document_id=document.id or "unknown",
+                    message=f"Ingestion failed: {str(e)}",
+                    processing_time=(datetime.now() - start_time).total_seconds()
+                )
+                continue
+            all_points.extend(points)
+            built.append((i, chunk_count))
+        
+        success = self.qdrant.upsert_points(all_points, wait=wait) if all_points else True
+        processing_time = (datetime.now() - start_time).total_seconds()
+        
+        for i, chunk_count in built:
+            document = documents[i]
+            if success:
+                results[i] = IngestionResult(
+                    success=True,
+                    document_id=document.id,
+                    message=f"Document ingested successfully with {chunk_count} chunks",
+                    processing_time=processing_time,
+                    token_count=len(document.content.split()),
+                    chunk_count=chunk_count
+                )
+            else:
+                results[i] = IngestionResult(
+                    success=False,
+                    document_id=document.id,
+                    message="Failed to upsert document points",
+                    processing_time=processing_time
+                )
         
         successful = sum(1 for r in results if r.success)
         self.logger.info(f"Batch ingestion completed: {successful}/{len(results)} documents successful")
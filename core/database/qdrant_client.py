@@ -10,7 +10,8 @@ from qdrant_client.models import (
     Distance, VectorParams, PointStruct, Filter, FieldCondition, 
     Range, MatchValue, OptimizersConfigDiff, HnswConfigDiff, CollectionInfo
 )
-from typing import List, Dict, Any, Optional, Union
+from typing import Iterator, List, Dict, Any, Optional, Union
+from contextlib import contextmanager
 import logging
 import uuid
 from dataclasses import dataclass
@@ -18,6 +19,9 @@ import time
 
 from ..config import Settings
 
+# HNSW graph degree used for new collections
+HNSW_M = 16
+
 
 @dataclass
 class SearchPoint:
@@ -73,7 +77,7 @@ class QdrantManager:
                     max_optimization_threads=2
                 ),
                 hnsw_config=HnswConfigDiff(
-                    m=16,
+                    m=HNSW_M,
                     ef_construct=100,
                     full_scan_threshold=10000,
                     max_indexing_threads=2,
@@ -86,6 +90,31 @@ class QdrantManager:
             self.logger.error(f"Error creating collection: {e}")
             raise
     
+    @contextmanager
+    def deferred_indexing(self) -> Iterator[None]:
+        """Suspend HNSW graph building for the duration of a bulk load.
+
+        Sets ``m=0`` on the collection so upserts don't compete with
+        incremental index construction, then restores the previous ``m``
+        on exit, even if the load fails.  Qdrant's optimizer builds the
+        graph in one pass once ``m`` is restored.
+        """
+        info = self.client.get_collection(self.collection_name)
+        previous_m = info.config.hnsw_config.m or HNSW_M
+        self.client.update_collection(
+            collection_name=self.collection_name,
+            hnsw_config=HnswConfigDiff(m=0)
+        )
+        self.logger.info(f"Deferred HNSW indexing on '{self.collection_name}'")
+        try:
+            yield
+        finally:
+            self.client.update_collection(
+                collection_name=self.collection_name,
+                hnsw_config=HnswConfigDiff(m=previous_m)
+            )
+            self.logger.info(f"Restored HNSW indexing on '{self.collection_name}' (m={previous_m})")
+    
     def get_collection_info(self) -> Optional[CollectionInfo]:
         """Get information about the collection."""
         try:
@@ -97,9 +126,14 @@ class QdrantManager:
     def upsert_points(
         self, 
         points: List[PointStruct], 
-        batch_size: int = 100
+        batch_size: int = 100,
+        wait: bool = True
     ) -> bool:
-        """Upsert points in batches for optimal performance."""
+        """Upsert points in batches for optimal performance.
+
+        With ``wait=False`` each request returns once Qdrant has accepted the
+        batch, without waiting for it to be indexed.
+        """
         try:
             total_points = len(points)
             self.logger.info(f"Upserting {total_points} points in batches of {batch_size}")
@@ -110,7 +144,7 @@ class QdrantManager:
                 operation_info = self.client.upsert(
                     collection_name=self.collection_name,
                     points=batch,
-                    wait=True
+                    wait=wait
                 )
                 
                 self.logger.debug(f"Batch {i//batch_size + 1}: {operation_info}")
@@ -202,27 +202,22 @@ class ResponseAnalysis(BaseModel):
         if not self.sources_used:
             return "No sources available."
         
-        # De-duplicate references (same work may appear for multiple chunks)
-        seen: set = set()
-        references: list = []
+        # De-duplicate references (same work may appear for multiple chunks);
+        # dict keys keep first-seen order, so one container does both jobs
+        details_by_id = {}
+        for s in self.source_details:
+            details_by_id.setdefault(s.get("id"), s)
+        references: Dict[str, None] = {}
         for source_id in self.sources_used:
-            source_detail = next(
-                (s for s in self.source_details if s.get("id") == source_id),
-                {"id": source_id}
-            )
+            source_detail = details_by_id.get(source_id, {"id": source_id})
             ref = source_detail.get("apa_reference")
-            if ref and ref not in seen:
-                seen.add(ref)
-                references.append(ref)
-            elif not ref:
+            if not ref:
                 # Fallback for sources without full APA data
                 title = source_detail.get("title", f"Source {source_id}")
                 author = source_detail.get("author", "Unknown")
                 year = source_detail.get("year", "n.d.")
-                fallback = f"{author} ({year}). {title}."
-                if fallback not in seen:
-                    seen.add(fallback)
-                    references.append(fallback)
+                ref = f"{author} ({year}). {title}."
+            references[ref] = None
         
         if not references:
             return "No sources available."
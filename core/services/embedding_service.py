@@ -8,12 +8,19 @@ multiple providers, automatic batching, caching, and async processing.
 import openai
 import re
 import tiktoken
+from array import array
+from collections import OrderedDict, deque
+from pathlib import Path
 from typing import List, Dict, Any, Optional, Union
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 import logging
 import asyncio
 import aiohttp
 import hashlib
+import math
+import os
+import sqlite3
+import struct
 import time
 import json
 from datetime import datetime, timedelta
@@ -25,6 +32,31 @@ MIN_BATCH_SIZE = 8
 MAX_BATCH_SIZE = 2048
 AIMD_ADDITIVE_INCREASE = 50   # on success: batch_size += this
 AIMD_MULTIPLICATIVE_DECREASE = 0.5  # on 429/too-large: batch_size *= this
+# Latency feedback: back off before the provider starts returning 429s
+AIMD_LATENCY_WINDOW = 32  # recent batches in the per-text latency average
+AIMD_LATENCY_TARGET = 0.02  # seconds of request time per text
+AIMD_LATENCY_DECREASE = 0.8  # on slow window: batch_size *= this
+
+# Rate-limit reset durations in x-ratelimit-reset-* headers, e.g. "6m0s", "250ms"
+_RESET_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_RESET_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+# OpenAI caps the total input tokens of a single embeddings request
+MAX_TOKENS_PER_REQUEST = 300_000
+
+# Expired cache entries are swept once every this many sets
+CACHE_SWEEP_INTERVAL = 1024
+
+# Hashes per IN (...) lookup in the persistent cache, under SQLite's
+# historical limit of 999 bound parameters
+PERSISTENT_CACHE_LOOKUP_SIZE = 500
+
+# Worker threads for tiktoken's batch encode/decode, which release the
+# GIL; tiktoken's own default is 8 regardless of the core count
+TOKENIZER_THREADS = os.cpu_count() or 8
+
+# Texts tokenized per encode_ordinary_batch call in estimate_cost
+ESTIMATE_TOKENIZE_SLICE = 256
 
 
 @dataclass
@@ -40,34 +72,74 @@ class EmbeddingResult:
 
 
 class EmbeddingCache:
-    """Simple in-memory cache for embeddings."""
+    """Simple in-memory LRU cache for embeddings.
+    
+    Vectors are held as float32 arrays (4 bytes per dimension instead of
+    a 24-byte float object plus pointer) and turned back into lists on a
+    hit.
+    """
     
     def __init__(self, max_size: int = 10000, ttl_hours: int = 24):
-        self.cache: Dict[str, tuple[EmbeddingResult, datetime]] = {}
+        # Ordered least- to most-recently used; values are
+        # (result, expiry) with expiry on the time.monotonic() clock and
+        # result.embedding stored as array("f")
+        self.cache: OrderedDict[str, tuple[EmbeddingResult, float]] = OrderedDict()
         self.max_size = max_size
         self.ttl = timedelta(hours=ttl_hours)
+        self._ttl_seconds = self.ttl.total_seconds()
+        self._sets_since_sweep = 0
         self.logger = logging.getLogger(__name__)
     
     def get(self, text_hash: str) -> Optional[EmbeddingResult]:
         """Get cached embedding if available and not expired."""
-        if text_hash in self.cache:
-            result, timestamp = self.cache[text_hash]
-            if datetime.now() - timestamp < self.ttl:
-                result.cached = True
-                return result
-            else:
-                # Remove expired entry
-                del self.cache[text_hash]
+        entry = self.cache.get(text_hash)
+        if entry is None:
+            return None
+        result, expiry = entry
+        if expiry > time.monotonic():
+            self.cache.move_to_end(text_hash)
+            return replace(result, embedding=result.embedding.tolist(), cached=True)
+        # Remove expired entry
+        del self.cache[text_hash]
         return None
     
     def set(self, text_hash: str, result: EmbeddingResult) -> None:
         """Cache an embedding result."""
-        # Remove oldest entries if cache is full
-        if len(self.cache) >= self.max_size:
-            oldest_key = min(self.cache.keys(), key=lambda k: self.cache[k][1])
-            del self.cache[oldest_key]
+        self._sets_since_sweep += 1
+        if self._sets_since_sweep >= CACHE_SWEEP_INTERVAL:
+            self.sweep_expired()
+        
+        if text_hash in self.cache:
+            self.cache.move_to_end(text_hash)
+        elif len(self.cache) >= self.max_size:
+            # Evict the least recently used entry
+            self.cache.popitem(last=False)
         
-        self.cache[text_hash] = (result, datetime.now())
+        compact = replace(result, embedding=array("f", result.embedding))
+        self.cache[text_hash] = (compact, time.monotonic() + self._ttl_seconds)
+    
+    def get_many(self, text_hashes: List[str]) -> Dict[str, EmbeddingResult]:
+        """Get every cached, unexpired embedding among ``text_hashes``."""
+        found = {}
+        for text_hash in text_hashes:
+            result = self.get(text_hash)
+            if result is not None:
+                found[text_hash] = result
+        return found
+    
+    def set_many(self, results: List[EmbeddingResult]) -> None:
+        """Cache several embedding results under their own text hashes."""
+        for result in results:
+            self.set(result.text_hash, result)
+    
+    def sweep_expired(self) -> int:
+        """Drop all expired entries and return how many were removed."""
+        now = time.monotonic()
+        expired = [key for key, (_, expiry) in self.cache.items() if expiry <= now]
+        for key in expired:
+            del self.cache[key]
+        self._sets_since_sweep = 0
+        return len(expired)
     
     def clear(self) -> None:
         """Clear the cache."""
@@ -83,13 +155,156 @@ class EmbeddingCache:
         }
 
 
+def _pack_float16(vector: List[float]) -> bytes:
+    """Encode a vector as little-endian float16 bytes."""
+    return struct.pack(f"<{len(vector)}e", *vector)
+
+
+def _unpack_float16(blob: bytes) -> List[float]:
+    """Decode little-endian float16 bytes back into a list of floats."""
+    return list(struct.unpack(f"<{len(blob) // 2}e", blob))
+
+
+class PersistentEmbeddingCache:
+    """SQLite-backed embedding cache that survives restarts.
+    
+    Same interface as EmbeddingCache.  Vectors are stored as float16
+    blobs, half the size of float32: the API's embeddings are unit
+    length, so every component is well inside float16's range and the
+    rounding error (under 1e-3 per component) barely moves cosine
+    similarity.  Expiry uses wall-clock time since entries outlive the
+    process.  The database runs in WAL mode so concurrent ingests can
+    share one file.
+    """
+    
+    def __init__(self, path: Union[str, Path], ttl_hours: int = 24 * 30):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = timedelta(hours=ttl_hours)
+        self._ttl_seconds = self.ttl.total_seconds()
+        self.logger = logging.getLogger(__name__)
+        
+        self.conn = sqlite3.connect(str(self.path), isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "text_hash TEXT PRIMARY KEY, "
+            "model TEXT NOT NULL, "
+            "token_count INTEGER NOT NULL, "
+            "embedding BLOB NOT NULL, "
+            "expires_at REAL NOT NULL)"
+        )
+    
+    def get(self, text_hash: str) -> Optional[EmbeddingResult]:
+        """Get cached embedding if available and not expired."""
+        row = self.conn.execute(
+            "SELECT model, token_count, embedding FROM embeddings "
+            "WHERE text_hash = ? AND expires_at > ?",
+            (text_hash, time.time()),
+        ).fetchone()
+        if row is None:
+            return None
+        model, token_count, blob = row
+        return EmbeddingResult(
+            embedding=_unpack_float16(blob),
+            token_count=token_count,
+            processing_time=0.0,
+            text_hash=text_hash,
+            model_used=model,
+            cached=True,
+        )
+    
+    def set(self, text_hash: str, result: EmbeddingResult) -> None:
+        """Cache an embedding result."""
+        self.conn.execute(
+            "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?, ?)",
+            (
+                text_hash,
+                result.model_used,
+                result.token_count,
+                _pack_float16(result.embedding),
+                time.time() + self._ttl_seconds,
+            ),
+        )
+    
+    def get_many(self, text_hashes: List[str]) -> Dict[str, EmbeddingResult]:
+        """Get every cached, unexpired embedding among ``text_hashes``.
+        
+        Looks hashes up PERSISTENT_CACHE_LOOKUP_SIZE at a time with one
+        ``IN (...)`` query each, instead of one query per text.
+        """
+        found = {}
+        now = time.time()
+        for start in range(0, len(text_hashes), PERSISTENT_CACHE_LOOKUP_SIZE):
+            chunk = text_hashes[start:start + PERSISTENT_CACHE_LOOKUP_SIZE]
+            placeholders = ", ".join("?" * len(chunk))
+            rows = self.conn.execute(
+                "SELECT text_hash, model, token_count, embedding FROM embeddings "
+                f"WHERE text_hash IN ({placeholders}) AND expires_at > ?",
+                (*chunk, now),
+            )
+            for text_hash, model, token_count, blob in rows:
+                found[text_hash] = EmbeddingResult(
+                    embedding=_unpack_float16(blob),
+                    token_count=token_count,
+                    processing_time=0.0,
+                    text_hash=text_hash,
+                    model_used=model,
+                    cached=True,
+                )
+        return found
+    
+    def set_many(self, results: List[EmbeddingResult]) -> None:
+        """Cache several embedding results in a single transaction."""
+        expires_at = time.time() + self._ttl_seconds
+        with self.conn:
+            self.conn.execute("BEGIN")
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?, ?)",
+                (
+                    (
+                        result.text_hash,
+                        result.model_used,
+                        result.token_count,
+                        _pack_float16(result.embedding),
+                        expires_at,
+                    )
+                    for result in results
+                ),
+            )
+    
+    def sweep_expired(self) -> int:
+        """Drop all expired entries and return how many were removed."""
+        cursor = self.conn.execute("DELETE FROM embeddings WHERE expires_at <= ?", (time.time(),))
+        return cursor.rowcount
+    
+    def clear(self) -> None:
+        """Clear the cache."""
+        self.conn.execute("DELETE FROM embeddings")
+        self.logger.info("Embedding cache cleared")
+    
+    def close(self) -> None:
+        """Close the database connection."""
+        self.conn.close()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        (size,) = self.conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        return {
+            "size": size,
+            "path": str(self.path),
+            "ttl_hours": self.ttl.total_seconds() / 3600
+        }
+
+
 class EmbeddingService:
     """Production-grade embedding service with batching and caching."""
     
     def __init__(self, settings: Settings, enable_cache: bool = True):
         """Initialize embedding service."""
         self.settings = settings
-        self.client = openai.OpenAI(api_key=settings.openai_api_key)
+        self.client = openai.AsyncOpenAI(api_key=settings.openai_api_key)
         self.model = settings.embedding_model
         # Use cl100k_base encoding which is used by text-embedding models
         try:
@@ -103,14 +318,27 @@ class EmbeddingService:
             MIN_BATCH_SIZE,
             min(MAX_BATCH_SIZE, settings.batch_size)
         )
+        self._latency_window: deque[float] = deque(maxlen=AIMD_LATENCY_WINDOW)
+        # Slow start: double on success until the first decrease
+        self._in_slow_start = True
         self.logger = logging.getLogger(__name__)
         
-        # Initialize cache
-        self.cache = EmbeddingCache() if enable_cache else None
+        # Initialize cache (persistent when a cache path is configured)
+        if not enable_cache:
+            self.cache = None
+        elif settings.embedding_cache_path:
+            self.cache = PersistentEmbeddingCache(settings.embedding_cache_path)
+        else:
+            self.cache = EmbeddingCache()
         
-        # Rate limiting
-        self.last_request_time = 0
-        self.min_request_interval = 0.1  # 100ms between API requests to avoid rate limits
+        # Rate limiting: batches run concurrently, bounded by sliding
+        # one-minute windows of requests and tokens sent
+        self.max_concurrent_requests = settings.max_concurrent_embeddings
+        self.rpm_limit = settings.embedding_rpm_limit
+        self.tpm_limit = settings.embedding_tpm_limit
+        self._request_times: deque[float] = deque()
+        self._token_times: deque[tuple[float, int]] = deque()
+        self._window_tokens = 0
 
     @property
     def effective_batch_size(self) -> int:
@@ -127,43 +355,74 @@ class EmbeddingService:
         if not texts:
             return []
         
-        # Preprocess texts
-        processed_texts = [self._preprocess_text(text) for text in texts]
+        # Preprocess texts (token counts are kept for the results)
+        prepared = self._prepare_texts(texts)
         
-        # Check cache first
+        # Check cache first; repeats within this call (page headers,
+        # boilerplate) are resolved from their first occurrence
         results = []
         uncached_texts = []
+        uncached_token_counts = []
+        uncached_hashes = []
         uncached_indices = []
+        first_index_by_hash: Dict[str, int] = {}
+        duplicates = []
+        
+        text_hashes = [self._hash_text(text) for text, _ in prepared]
+        # One bulk lookup; the persistent cache answers it in a few queries
+        cached = self.cache.get_many(list(dict.fromkeys(text_hashes))) if self.cache else {}
         
-        for i, text in enumerate(processed_texts):
-            text_hash = self._hash_text(text)
+        for i, ((text, token_count), text_hash) in enumerate(zip(prepared, text_hashes)):
+            if text_hash in first_index_by_hash:
+                duplicates.append((i, first_index_by_hash[text_hash]))
+                continue
+            first_index_by_hash[text_hash] = i
             
-            if self.cache:
-                cached_result = self.cache.get(text_hash)
-                if cached_result:
-                    results.append((i, cached_result))
-                    continue
+            cached_result = cached.get(text_hash)
+            if cached_result:
+                results.append((i, cached_result))
+                continue
             
             uncached_texts.append(text)
+            uncached_token_counts.append(token_count)
+            uncached_hashes.append(text_hash)
             uncached_indices.append(i)
         
         # Process uncached texts
         if uncached_texts:
             # Split into optimal batches (size adapts at runtime)
-            batches = self._create_batches(uncached_texts, self._effective_batch_size)
+            batches = self._create_token_batches(
+                uncached_texts, uncached_token_counts, self._effective_batch_size
+            )
+            semaphore = asyncio.Semaphore(self.max_concurrent_requests)
+
+            async def process_bounded(
+                batch: List[str], token_counts: List[int], text_hashes: List[str]
+            ) -> List[EmbeddingResult]:
+                async with semaphore:
+                    return await self._process_batch(batch, token_counts, text_hashes)
+
+            # gather preserves batch order, so results still line up with
+            # uncached_indices
             batch_results = []
-            
-            for batch in batches:
-                batch_result = await self._process_batch(batch)
+            for batch_result in await asyncio.gather(*(
+                process_bounded(batch, counts, hashes)
+                for (batch, counts), hashes in zip(batches, self._split_like(uncached_hashes, batches))
+            )):
                 batch_results.extend(batch_result)
             
             # Add to results and cache
             for i, result in enumerate(batch_results):
                 original_index = uncached_indices[i]
                 results.append((original_index, result))
-                
-                if self.cache:
-                    self.cache.set(result.text_hash, result)
+            
+            if self.cache:
+                self.cache.set_many(batch_results)
+        
+        if duplicates:
+            result_by_index = dict(results)
+            for i, first_index in duplicates:
+                results.append((i, replace(result_by_index[first_index], cached=True)))
         
         # Sort results by original index
         results.sort(key=lambda x: x[0])
@@ -171,20 +430,35 @@ class EmbeddingService:
     
     def _preprocess_text(self, text: str) -> str:
         """Optimize text for embedding generation."""
-        if not text:
-            return ""
+        return self._prepare_text(text)[0]
+    
+    def _prepare_text(self, text: str) -> tuple[str, int]:
+        """Preprocess text and return it with its token count."""
+        return self._prepare_texts([text])[0]
+    
+    def _prepare_texts(self, texts: List[str]) -> List[tuple[str, int]]:
+        """Preprocess texts and return each with its token count.
         
+        All texts are tokenized in one encode_ordinary_batch call, which
+        tiktoken spreads over its thread pool.  The counts come from the
+        same encode used for truncation, so the batch pipeline never has
+        to tokenize a text a second time.
+        """
         # Remove excessive whitespace and normalize
-        text = " ".join(text.split())
+        normalized = [" ".join(text.split()) if text else "" for text in texts]
         
-        # Truncate if too long
-        tokens = self.encoding.encode(text)
-        if len(tokens) > self.max_tokens:
-            truncated_tokens = tokens[:self.max_tokens]
-            text = self.encoding.decode(truncated_tokens)
-            self.logger.warning(f"Text truncated from {len(tokens)} to {len(truncated_tokens)} tokens")
-        
-        return text
+        prepared = []
+        for text, tokens in zip(
+            normalized, self.encoding.encode_ordinary_batch(normalized, num_threads=TOKENIZER_THREADS)
+        ):
+            # Truncate if too long
+            if len(tokens) > self.max_tokens:
+                truncated_tokens = tokens[:self.max_tokens]
+                text = self.encoding.decode(truncated_tokens)
+                self.logger.warning(f"Text truncated from {len(tokens)} to {len(truncated_tokens)} tokens")
+                tokens = truncated_tokens
+            prepared.append((text, len(tokens)))
+        return prepared
     
     def _hash_text(self, text: str) -> str:
         """Generate hash for text caching."""
@@ -199,8 +473,144 @@ class EmbeddingService:
             batches.append(batch)
         return batches
     
+    def _create_token_batches(
+        self,
+        texts: List[str],
+        token_counts: List[int],
+        batch_size: int,
+    ) -> List[tuple[List[str], List[int]]]:
+        """Split texts into batches bounded by count and total tokens.
+        
+        Texts keep their order.  A batch is closed when it holds
+        ``batch_size`` texts or the next text would push it over
+        MAX_TOKENS_PER_REQUEST, so long chunks no longer produce requests
+        the API rejects as too large.  Returns ``(texts, token_counts)``
+        pairs.
+        """
+        batches = []
+        current_texts: List[str] = []
+        current_counts: List[int] = []
+        current_tokens = 0
+        for text, count in zip(texts, token_counts):
+            if current_texts and (
+                len(current_texts) >= batch_size
+                or current_tokens + count > MAX_TOKENS_PER_REQUEST
+            ):
+                batches.append((current_texts, current_counts))
+                current_texts, current_counts, current_tokens = [], [], 0
+            current_texts.append(text)
+            current_counts.append(count)
+            current_tokens += count
+        if current_texts:
+            batches.append((current_texts, current_counts))
+        return batches
+    
+    def _adapt_batch_size(self, batch_len: int, latency_per_text: float) -> None:
+        """AIMD step after a successful request, driven by observed latency.
+        
+        A window average above AIMD_LATENCY_TARGET shrinks the batch size
+        multiplicatively.  Otherwise it grows, but only when the batch
+        actually used at least half the current size, so the limit does
+        not run away while requests are small.  Growth doubles the size
+        during slow start and is additive after the first decrease.
+        """
+        window = self._latency_window
+        window.append(latency_per_text)
+        old = self._effective_batch_size
+        
+        if sum(window) / len(window) > AIMD_LATENCY_TARGET:
+            self._effective_batch_size = max(
+                MIN_BATCH_SIZE,
+                int(old * AIMD_LATENCY_DECREASE)
+            )
+            self._in_slow_start = False
+            # Measure afresh at the new size
+            window.clear()
+        elif batch_len * 2 >= old:
+            self._effective_batch_size = min(
+                MAX_BATCH_SIZE,
+                old * 2 if self._in_slow_start else old + AIMD_ADDITIVE_INCREASE
+            )
+        
+        if self._effective_batch_size != old:
+            self.logger.debug(f"AIMD: batch size {old} -> {self._effective_batch_size}")
+    
+    async def _acquire_rate_limit(self, tokens: int) -> None:
+        """Wait until a request of ``tokens`` fits the RPM and TPM windows.
+        
+        The request is recorded when it is admitted rather than when it
+        completes, so concurrent batches cannot all pass the check at once.
+        A single request larger than the TPM limit is admitted once the
+        window is empty.
+        """
+        while True:
+            now = time.monotonic()
+            cutoff = now - 60.0
+            while self._request_times and self._request_times[0] <= cutoff:
+                self._request_times.popleft()
+            while self._token_times and self._token_times[0][0] <= cutoff:
+                self._window_tokens -= self._token_times.popleft()[1]
+            
+            requests_full = len(self._request_times) >= self.rpm_limit
+            tokens_full = bool(self._token_times) and self._window_tokens + tokens > self.tpm_limit
+            if not requests_full and not tokens_full:
+                self._request_times.append(now)
+                self._token_times.append((now, tokens))
+                self._window_tokens += tokens
+                return
+            
+            # Sleep until the oldest entry blocking us leaves the window
+            oldest = self._request_times[0] if requests_full else self._token_times[0][0]
+            delay = oldest + 60.0 - now
+            self.logger.debug(f"Rate limit window full, waiting {delay:.1f}s")
+            await asyncio.sleep(delay)
+    
+    @staticmethod
+    def _retry_after_from_headers(e: Exception) -> Optional[float]:
+        """Seconds to wait according to a rate-limit response's headers.
+        
+        Checks ``retry-after-ms``, ``retry-after`` and the longer of the
+        ``x-ratelimit-reset-requests`` / ``x-ratelimit-reset-tokens``
+        durations.  Returns None if the error carries no usable header.
+        """
+        response = getattr(e, "response", None)
+        headers = getattr(response, "headers", None)
+        if not headers:
+            return None
+        
+        try:
+            if headers.get("retry-after-ms"):
+                return float(headers["retry-after-ms"]) / 1000.0
+            if headers.get("retry-after"):
+                return float(headers["retry-after"])
+        except ValueError:
+            pass  # e.g. an HTTP date; try the reset headers instead
+        
+        resets = []
+        for name in ("x-ratelimit-reset-requests", "x-ratelimit-reset-tokens"):
+            value = headers.get(name)
+            if value:
+                parts = _RESET_DURATION_RE.findall(value)
+                if parts:
+                    resets.append(sum(
+                        float(amount) * _RESET_DURATION_UNITS[unit] for amount, unit in parts
+                    ))
+        return max(resets) if resets else None
+    
+    @staticmethod
+    def _split_like(items: List[Any], batches: List[tuple[List[str], List[int]]]) -> List[List[Any]]:
+        """Split ``items`` along the same boundaries as ``batches``."""
+        parts = []
+        offset = 0
+        for batch_texts, _ in batches:
+            parts.append(items[offset:offset + len(batch_texts)])
+            offset += len(batch_texts)
+        return parts
+    
     def _should_reduce_batch(self, e: Exception) -> bool:
         """True if error indicates we should retry with a smaller batch (429 or request too large)."""
+        if isinstance(e, openai.RateLimitError):
+            return True
         err_str = str(e).lower()
         if "429" in err_str or "rate limit" in err_str:
             return True
@@ -210,38 +620,38 @@ class EmbeddingService:
             return True
         return False
 
-    async def _process_batch(self, texts: List[str]) -> List[EmbeddingResult]:
+    async def _process_batch(
+        self,
+        texts: List[str],
+        token_counts: List[int],
+        text_hashes: List[str],
+    ) -> List[EmbeddingResult]:
         """Process a batch of texts with retry logic and self-adaptive batch size."""
         start_time = time.time()
         max_retries = 5
         base_delay = 2.0  # seconds when retry-after not in error
 
         for attempt in range(max_retries):
-            # Throttle: wait before each attempt
-            current_time = time.time()
-            time_since_last = current_time - self.last_request_time
-            if time_since_last < self.min_request_interval:
-                await asyncio.sleep(self.min_request_interval - time_since_last)
+            # Throttle: wait for room in the RPM/TPM windows
+            await self._acquire_rate_limit(sum(token_counts))
 
             try:
-                response = self.client.embeddings.create(
+                request_start = time.time()
+                response = await self.client.embeddings.create(
                     input=texts,
                     model=self.model
                 )
 
-                self.last_request_time = time.time()
-                processing_time = self.last_request_time - start_time
+                request_end = time.time()
+                processing_time = request_end - start_time
 
                 results = []
                 for i, embedding_data in enumerate(response.data):
-                    text_hash = self._hash_text(texts[i])
-                    token_count = len(self.encoding.encode(texts[i]))
-
                     results.append(EmbeddingResult(
                         embedding=embedding_data.embedding,
-                        token_count=token_count,
+                        token_count=token_counts[i],
                         processing_time=processing_time / len(texts),
-                        text_hash=text_hash,
+                        text_hash=text_hashes[i],
                         model_used=self.model,
                         cached=False,
                         created_at=datetime.now()
@@ -251,15 +661,10 @@ class EmbeddingService:
                     f"Processed batch of {len(texts)} texts in {processing_time:.3f}s "
                     f"(effective_batch_size={self._effective_batch_size})"
                 )
-                # AIMD: additive increase on success
-                if self._effective_batch_size < MAX_BATCH_SIZE:
-                    old = self._effective_batch_size
-                    self._effective_batch_size = min(
-                        MAX_BATCH_SIZE,
-                        self._effective_batch_size + AIMD_ADDITIVE_INCREASE
-                    )
-                    if self._effective_batch_size != old:
-                        self.logger.debug(f"AIMD: batch size increased to {self._effective_batch_size}")
+                # AIMD: latency-aware step on success
+                self._adapt_batch_size(
+                    len(texts), (request_end - request_start) / len(texts)
+                )
                 return results
 
             except Exception as e:
@@ -273,30 +678,40 @@ class EmbeddingService:
                         int(self._effective_batch_size * AIMD_MULTIPLICATIVE_DECREASE)
                     )
                     self._effective_batch_size = new_size
+                    self._in_slow_start = False
                     self.logger.warning(
                         f"AIMD: batch size reduced to {new_size} after error, "
                         f"retrying {len(texts)} texts in sub-batches"
                     )
-                    sub_batches = self._create_batches(texts, new_size)
+                    sub_batches = self._create_token_batches(texts, token_counts, new_size)
                     all_results = []
-                    for sub_batch in sub_batches:
-                        sub_results = await self._process_batch(sub_batch)
+                    for (sub_batch, sub_counts), sub_hashes in zip(
+                        sub_batches, self._split_like(text_hashes, sub_batches)
+                    ):
+                        sub_results = await self._process_batch(sub_batch, sub_counts, sub_hashes)
                         all_results.extend(sub_results)
                     return all_results
 
                 # Already at min batch size or single text: retry with delay (rate limit backoff)
-                if is_retryable and ("429" in err_str or "rate limit" in err_str) and attempt < max_retries - 1:
-                    delay = base_delay
-                    if "try again in" in err_str:
-                        m = re.search(r"try again in (\d+)ms", err_str)
-                        if m:
-                            delay = int(m.group(1)) / 1000.0
-                        else:
-                            m = re.search(r"try again in (\d+)s", err_str)
+                is_rate_limit = (
+                    isinstance(e, openai.RateLimitError)
+                    or "429" in err_str or "rate limit" in err_str
+                )
+                if is_retryable and is_rate_limit and attempt < max_retries - 1:
+                    delay = self._retry_after_from_headers(e)
+                    if delay is None:
+                        # No usable headers: fall back to hints in the message
+                        delay = base_delay
+                        if "try again in" in err_str:
+                            m = re.search(r"try again in (\d+)ms", err_str)
                             if m:
-                                delay = float(m.group(1))
-                    elif "tokens per min" in err_str or "tpm" in err_str:
-                        delay = 60.0
+                                delay = int(m.group(1)) / 1000.0
+                            else:
+                                m = re.search(r"try again in (\d+)s", err_str)
+                                if m:
+                                    delay = float(m.group(1))
+                        elif "tokens per min" in err_str or "tpm" in err_str:
+                            delay = 60.0
                     delay = max(delay, 1.0)
                     self.logger.warning(
                         f"Rate limit hit, waiting {delay:.1f}s before retry ({attempt + 1}/{max_retries})"
@@ -320,31 +735,93 @@ class EmbeddingService:
         chunk_size = chunk_size or self.max_tokens
         overlap = overlap or self.settings.chunk_overlap_tokens
         
-        # Tokenize the text
-        tokens = self.encoding.encode(text)
-        
-        if len(tokens) <= chunk_size:
+        if self._fits_in_tokens(text, chunk_size):
             return [text]
         
-        chunks = []
-        start = 0
+        # Tokenize the text the same way chunk_texts does, so special-token
+        # strings are plain text whichever entry point is used
+        tokens = self.encoding.encode_ordinary(text)
         
-        while start < len(tokens):
-            end = min(start + chunk_size, len(tokens))
-            chunk_tokens = tokens[start:end]
-            chunk_text = self.encoding.decode(chunk_tokens)
-            chunks.append(chunk_text)
-            
-            # We've reached the end of the text
-            if end >= len(tokens):
-                break
-            
-            # Move start position with overlap, ensuring forward progress
-            start = max(start + 1, end - overlap)
+        if len(tokens) <= chunk_size:
+            return [text]
         
+        # Decode every window in one call on tiktoken's thread pool
+        chunks = self.encoding.decode_batch(
+            self._token_windows(tokens, chunk_size, overlap), num_threads=TOKENIZER_THREADS
+        )
         self.logger.debug(f"Split text into {len(chunks)} chunks")
         return chunks
     
+    def chunk_texts(
+        self,
+        texts: List[str],
+        chunk_size: Optional[int] = None,
+        overlap: Optional[int] = None
+    ) -> List[List[str]]:
+        """Split several texts into chunks with one tokenizer pass.
+        
+        Returns the chunks of each text, as chunk_text would.  All texts
+        are tokenized in one encode_ordinary_batch call and every window
+        is decoded in one decode_batch call, both on tiktoken's thread
+        pool, instead of two tokenizer round trips per text.  Texts that
+        are certainly a single chunk aren't tokenized at all.
+        """
+        chunk_size = chunk_size or self.max_tokens
+        overlap = overlap or self.settings.chunk_overlap_tokens
+        
+        whole = [not text or self._fits_in_tokens(text, chunk_size) for text in texts]
+        to_encode = [text for text, keep in zip(texts, whole) if not keep]
+        encoded = iter(
+            self.encoding.encode_ordinary_batch(to_encode, num_threads=TOKENIZER_THREADS)
+            if to_encode else ()
+        )
+        
+        results: List[List[str]] = []
+        windows: List[List[int]] = []
+        window_counts: List[int] = []  # windows per text, -1 if kept whole
+        for text, keep in zip(texts, whole):
+            tokens = None if keep else next(encoded)
+            if tokens is None or len(tokens) <= chunk_size:
+                results.append([text] if text else [])
+                window_counts.append(-1)
+                continue
+            text_windows = self._token_windows(tokens, chunk_size, overlap)
+            windows.extend(text_windows)
+            window_counts.append(len(text_windows))
+            results.append([])
+        
+        decoded = self.encoding.decode_batch(windows, num_threads=TOKENIZER_THREADS) if windows else []
+        offset = 0
+        for i, count in enumerate(window_counts):
+            if count >= 0:
+                results[i] = decoded[offset:offset + count]
+                offset += count
+        return results
+    
+    @staticmethod
+    def _fits_in_tokens(text: str, limit: int) -> bool:
+        """Whether ``text`` certainly encodes to at most ``limit`` tokens.
+        
+        Every BPE token covers at least one UTF-8 byte, so a text of at
+        most ``limit`` bytes can't exceed ``limit`` tokens.  The character
+        count is checked first since it never exceeds the byte count.
+        """
+        return len(text) <= limit and (text.isascii() or len(text.encode("utf-8")) <= limit)
+    
+    @staticmethod
+    def _token_windows(tokens: List[int], chunk_size: int, overlap: int) -> List[List[int]]:
+        """Overlapping windows of at most ``chunk_size`` tokens covering ``tokens``.
+        
+        Window starts are computed arithmetically: consecutive windows
+        advance by ``chunk_size - overlap`` tokens (at least one), and the
+        last window is the first one that reaches the end of ``tokens``.
+        """
+        if not tokens:
+            return []
+        step = max(1, chunk_size - overlap)
+        last_start = max(len(tokens) - chunk_size, 0)
+        return [tokens[start:start + chunk_size] for start in range(0, last_start + step, step)]
+    
     async def embed_document_with_chunks(
         self, 
         content: str,
@@ -363,6 +840,39 @@ class EmbeddingService:
             main_embedding = await self.create_embedding(content)
             return main_embedding, []
     
+    async def embed_documents_with_chunks(
+        self,
+        contents: List[str],
+        chunk_size: Optional[int] = None
+    ) -> List[tuple[EmbeddingResult, List[EmbeddingResult]]]:
+        """Embed several documents and their chunks in one batch call.
+        
+        Returns one ``(main_embedding, chunk_embeddings)`` pair per
+        document, as embed_document_with_chunks would.  All texts go
+        through a single create_embeddings_batch call, so short documents
+        share API requests instead of costing one round trip each.
+        """
+        chunk_lists = [self.chunk_text(content, chunk_size) for content in contents]
+        
+        # Single-chunk documents are embedded from their full content
+        texts: List[str] = []
+        for content, chunks in zip(contents, chunk_lists):
+            texts.extend(chunks if len(chunks) > 1 else [content])
+        
+        embeddings = await self.create_embeddings_batch(texts)
+        
+        results = []
+        offset = 0
+        for chunks in chunk_lists:
+            if len(chunks) > 1:
+                chunk_embeddings = embeddings[offset:offset + len(chunks)]
+                results.append((chunk_embeddings[0], chunk_embeddings))
+                offset += len(chunks)
+            else:
+                results.append((embeddings[offset], []))
+                offset += 1
+        return results
+    
     def get_cache_stats(self) -> Dict[str, Any]:
         """Get embedding cache statistics."""
         if self.cache:
@@ -375,16 +885,38 @@ class EmbeddingService:
             self.cache.clear()
     
     def estimate_cost(self, texts: List[str]) -> Dict[str, Any]:
-        """Estimate the cost of embedding generation."""
-        total_tokens = sum(len(self.encoding.encode(text)) for text in texts)
+        """Estimate the cost of embedding generation.
+        
+        Texts are tokenized ESTIMATE_TOKENIZE_SLICE at a time across
+        TOKENIZER_THREADS threads, so only one slice's token lists are
+        alive at once; just the counts are kept.
+        """
+        token_counts = []
+        for start in range(0, len(texts), ESTIMATE_TOKENIZE_SLICE):
+            token_counts.extend(
+                len(tokens) for tokens in
+                self.encoding.encode_ordinary_batch(
+                    texts[start:start + ESTIMATE_TOKENIZE_SLICE], num_threads=TOKENIZER_THREADS
+                )
+            )
+        total_tokens = sum(token_counts)
         
         # Pricing for text-embedding-3-small (as of 2024)
         cost_per_1k_tokens = 0.00002  # $0.00002 per 1K tokens
         estimated_cost = (total_tokens / 1000) * cost_per_1k_tokens
         
+        # The token budget can only split batches when the total exceeds it;
+        # otherwise the count is plain arithmetic
+        if total_tokens <= MAX_TOKENS_PER_REQUEST:
+            batch_count = math.ceil(len(texts) / self._effective_batch_size)
+        else:
+            batch_count = len(
+                self._create_token_batches(texts, token_counts, self._effective_batch_size)
+            )
+        
         return {
             "total_tokens": total_tokens,
             "estimated_cost_usd": estimated_cost,
             "model": self.model,
-            "batch_count": len(self._create_batches(texts, self._effective_batch_size))
+            "batch_count": batch_count
         }
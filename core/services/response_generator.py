@@ -7,7 +7,8 @@ quality assessment, and support for multiple LLM providers.
 
 from typing import List, Dict, Any, Optional
 import instructor
-from openai import OpenAI
+import tiktoken
+from openai import AsyncOpenAI
 import logging
 import time
 from datetime import datetime
@@ -17,13 +18,19 @@ from ..citation import format_apa_inline, format_apa_reference, build_citation_k
 from ..config import Settings
 
 
+# Metadata fields shown for each source in the LLM context (page_number
+# enables precise page citations)
+_CONTEXT_METADATA_KEYS = ("title", "author", "year", "journal", "publisher", "chapter", "page_number")
+
+
 class ResponseGenerator:
     """Advanced response generation with multi-provider support and quality analysis."""
     
     def __init__(self, settings: Settings):
         """Initialize response generator."""
         self.settings = settings
-        self.openai_client = instructor.patch(OpenAI(api_key=settings.openai_api_key))
+        # Async client so generate_response() doesn't block the event loop
+        self.openai_client = instructor.patch(AsyncOpenAI(api_key=settings.openai_api_key))
         self.logger = logging.getLogger(__name__)
         
         # Response configuration
@@ -31,6 +38,12 @@ class ResponseGenerator:
         self.temperature = settings.response_temperature
         self.max_tokens = settings.max_response_tokens
         self.model = settings.openai_model
+
+        # Tokenizer for budgeting source content in the prompt
+        try:
+            self.encoding = tiktoken.encoding_for_model(self.model)
+        except KeyError:
+            self.encoding = tiktoken.get_encoding("cl100k_base")
     
     async def generate_response(
         self,
@@ -67,7 +80,7 @@ class ResponseGenerator:
         ]
         
         try:
-            response = self.openai_client.chat.completions.create(
+            response = await self.openai_client.chat.completions.create(
                 model=self.model,
                 messages=messages,
                 response_model=ResponseAnalysis,
@@ -81,7 +94,12 @@ class ResponseGenerator:
             response.query = query
             response.search_results_count = len(search_results)
             response.model_used = self.model
-            response.token_count = len(response.answer.split())  # Rough estimate
+            # instructor keeps the raw completion; its usage is the real count
+            usage = getattr(getattr(response, "_raw_response", None), "usage", None)
+            if usage is not None:
+                response.token_count = usage.completion_tokens
+            else:
+                response.token_count = len(self.encoding.encode_ordinary(response.answer))
             
             # Add detailed source information
             response.source_details = [result.get_source_info() for result in top_sources]
@@ -98,34 +116,44 @@ class ResponseGenerator:
             self.logger.error(f"Error generating response: {e}")
             return self._create_error_response(query, str(e), start_time)
     
-    # Maximum characters of content to include per source (~375 tokens)
-    MAX_CONTENT_CHARS_PER_SOURCE = 1500
+    # Tokens of content per source when all max_sources slots are filled
+    MAX_CONTENT_TOKENS_PER_SOURCE = 375
 
     def _build_context(self, search_results: List[SearchResult]) -> str:
         """Build structured context from search results, truncating to fit token budget.
 
+        The content budget is MAX_CONTENT_TOKENS_PER_SOURCE for each of the
+        configured ``max_sources`` slots, shared among the sources actually
+        present, so fewer results each get more of their text.
+
         Each source is labelled with an APA-style citation key so the LLM can
         produce proper in-text citations.
         """
+        if not search_results:
+            return ""
+        max_tokens = max(
+            1,
+            self.MAX_CONTENT_TOKENS_PER_SOURCE * self.max_sources // len(search_results),
+        )
         context_parts = []
         
-        for i, result in enumerate(search_results, 1):
+        for result in search_results:
             meta = result.metadata
             citation_key = build_citation_key(meta)
             inline_cite = format_apa_inline(meta)
 
-            # Build a compact metadata line (include page_number for precise citations)
-            metadata_items = []
-            for key in ("title", "author", "year", "journal", "publisher", "chapter", "page_number"):
-                value = meta.get(key)
-                if value is not None:
-                    metadata_items.append(f"{key}: {value}")
-            metadata_str = ", ".join(metadata_items) if metadata_items else "No metadata"
+            # Build a compact metadata line
+            metadata_items = [
+                f"{key}: {meta[key]}" for key in _CONTEXT_METADATA_KEYS if meta.get(key) is not None
+            ]
             
             # Truncate content to stay within token budget
             content = result.content
-            if len(content) > self.MAX_CONTENT_CHARS_PER_SOURCE:
-                content = content[:self.MAX_CONTENT_CHARS_PER_SOURCE] + "... [truncated]"
+            tokens = self.encoding.encode_ordinary(content)
+            if len(tokens) > max_tokens:
+                content = f"{self.encoding.decode(tokens[:max_tokens])}... [truncated]"
+            
+            metadata_str = ", ".join(metadata_items) if metadata_items else "No metadata"
             
             context_parts.append(f"""
 Source [{citation_key}] {inline_cite}:
@@ -165,14 +193,10 @@ REFERENCE FORMAT EXAMPLES:
     
     def _build_reference_list(self, search_results: List[SearchResult]) -> str:
         """Build an APA 7 reference list from the search results metadata."""
-        seen: set = set()
-        refs: list = []
-        for result in search_results:
-            ref_entry = format_apa_reference(result.metadata)
-            if ref_entry not in seen:
-                seen.add(ref_entry)
-                refs.append(ref_entry)
-        return "\n".join(refs)
+        # dict.fromkeys keeps the first occurrence of each entry, in order
+        return "\n".join(dict.fromkeys(
+            format_apa_reference(result.metadata) for result in search_results
+        ))
 
     def _create_user_prompt(self, query: str, context: str) -> str:
         """Create structured user prompt with query and context."""
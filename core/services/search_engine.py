@@ -7,6 +7,7 @@ with traditional keyword matching for superior retrieval accuracy.
 
 from qdrant_client.models import Filter, FieldCondition, Range, MatchValue
 from typing import List, Dict, Any, Optional, Tuple, Set
+import asyncio
 import logging
 import time
 import re
@@ -162,8 +163,11 @@ class HybridSearchEngine:
         # Prepare Qdrant filter
         qdrant_filter = self._build_filter(filters) if filters else None
         
-        # Perform vector search with expanded limit for reranking
-        vector_results = self.qdrant.search(
+        # Perform vector search with expanded limit for reranking; the
+        # blocking Qdrant call runs on a worker thread so concurrent
+        # searches overlap their round trips instead of queueing on the loop
+        vector_results = await asyncio.to_thread(
+            self.qdrant.search,
             query_vector=query_vector,
             limit=limit * 3,  # Get more results for reranking
             query_filter=qdrant_filter,
@@ -1,8 +1,13 @@
 #!/usr/bin/env python3
 """Convert PDFs and PPTX files in a subject folder to .txt files in documents/txt/."""
 
+import hashlib
+import json
+import os
 import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
@@ -10,19 +15,44 @@ sys.path.insert(0, str(project_root))
 import fitz  # PyMuPDF
 from pptx import Presentation
 
+from core.parsers.pdf import PDFMetadataExtractor
+
+# PDFs with at least this many pages are split into page-range tasks so
+# one long document doesn't keep a single worker busy while others idle
+PAGE_SPLIT_THRESHOLD = 32
+PAGES_PER_TASK = 16
+
+# Per-subject record of converted sources, kept next to the .txt files.
+# PDF entries also carry the PDF's document metadata, so ingestion can
+# use the .txt without opening the PDF again.
+CACHE_FILENAME = ".cache.json"
+
 
 def extract_text_from_pdf(pdf_path: Path) -> str:
     """Extract text from a PDF using PyMuPDF, with page number markers."""
-    doc = fitz.open(pdf_path)
+    return "\n\n".join(_extract_page_range(pdf_path, 0, None))
+
+
+def _extract_page_range(pdf_path: Path, start: int, end: Optional[int]) -> List[str]:
+    """Return the marked-up text of pages ``start`` to ``end`` (exclusive).
+
+    Opens its own document, so it is safe to run in a worker process.
+    """
+    with fitz.open(pdf_path) as doc:
+        return _page_texts(doc, start, doc.page_count if end is None else end)
+
+
+def _page_texts(doc: fitz.Document, start: int, end: int) -> List[str]:
+    """Marked-up text of pages ``start`` to ``end`` (exclusive) of an open document."""
     parts = []
-    for i, page in enumerate(doc, 1):
-        text = page.get_text()
-        if text.strip():
-            parts.append(f"--- Page {i} ---\n{text}")
+    for i in range(start, end):
+        text = doc[i].get_text()
+        # isspace() checks for blank pages without copying the text
+        if text and not text.isspace():
+            parts.append(f"--- Page {i + 1} ---\n{text}")
         else:
-            parts.append(f"--- Page {i} ---")
-    doc.close()
-    return "\n\n".join(parts)
+            parts.append(f"--- Page {i + 1} ---")
+    return parts
 
 
 def extract_text_from_pptx(pptx_path: Path) -> str:
@@ -41,6 +71,147 @@ def extract_text_from_pptx(pptx_path: Path) -> str:
     return "\n\n".join(slides_text)
 
 
+def _convert_one(
+    file_path: Path, txt_path: Path
+) -> Tuple[Optional[int], Optional[str], Optional[Dict[str, object]]]:
+    """Convert one file in a worker process and write its .txt.
+
+    Returns ``(word_count, error, cache_entry)``; ``word_count`` is None
+    when the file yielded no text, and ``cache_entry`` is only built for
+    files that were written.  The text itself stays in the worker so
+    large documents are not pickled back to the parent, and the hash and
+    PDF metadata are computed here, while the document is open, rather
+    than serially in the parent.
+    """
+    try:
+        metadata = None
+        if file_path.suffix.lower() == ".pdf":
+            with fitz.open(file_path) as doc:
+                pages = _page_texts(doc, 0, doc.page_count)
+                metadata = _document_metadata(doc, file_path)
+        else:
+            pages = [extract_text_from_pptx(file_path)]
+        word_count = _save_pages(pages, txt_path)
+        entry = _cache_entry(file_path, metadata) if word_count is not None else None
+        return word_count, None, entry
+    except Exception as e:
+        return None, str(e), None
+
+
+def _save_pages(pages: List[str], txt_path: Path) -> Optional[int]:
+    """Write ``pages`` to ``txt_path`` separated by blank lines.
+
+    Returns the word count, or None (and writes nothing) if the pages are
+    blank.  Pages are written one at a time so the joined text is never
+    held in memory next to them.
+    """
+    word_count = sum(len(page.split()) for page in pages)
+    if not word_count:
+        return None
+    with open(txt_path, "w", encoding="utf-8") as f:
+        for n, page in enumerate(pages):
+            if n:
+                f.write("\n\n")
+            f.write(page)
+    return word_count
+
+
+def _fingerprint(path: Path) -> str:
+    """SHA-256 of a file's contents, read in 1 MiB blocks.
+
+    SHA-256 rather than BLAKE2b: OpenSSL's SHA-256 uses the CPU's SHA
+    extensions where present, and then hashes whole files about twice as
+    fast as hashlib's BLAKE2b.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _load_cache(cache_path: Path) -> Dict[str, Dict[str, object]]:
+    """Load the conversion cache, or an empty one if missing or unreadable."""
+    try:
+        return json.loads(cache_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_cache(cache_path: Path, cache: Dict[str, Dict[str, object]]) -> None:
+    """Write the conversion cache atomically."""
+    tmp_path = cache_path.with_name(cache_path.name + ".tmp")
+    tmp_path.write_text(json.dumps(cache, indent=1, sort_keys=True), encoding="utf-8")
+    os.replace(tmp_path, cache_path)
+
+
+def _is_unchanged(file_path: Path, txt_path: Path, entry: Optional[Dict[str, object]]) -> bool:
+    """True if ``file_path`` was already converted to ``txt_path`` as is.
+
+    Size and mtime are checked first; the content hash is only computed
+    when they differ (e.g. after a fresh checkout), and the entry is
+    refreshed in place when the contents turn out to be the same.
+    """
+    if entry is None or not txt_path.exists():
+        return False
+    st = file_path.stat()
+    if entry.get("size") == st.st_size and entry.get("mtime_ns") == st.st_mtime_ns:
+        return True
+    if entry.get("size") != st.st_size or entry.get("hash") != _fingerprint(file_path):
+        return False
+    entry["mtime_ns"] = st.st_mtime_ns
+    return True
+
+
+def _cache_entry(
+    file_path: Path, metadata: Optional[Dict[str, object]] = None
+) -> Dict[str, object]:
+    """Cache entry describing the current contents of ``file_path``.
+
+    ``metadata`` (PDFs only) is stored with the entry.
+    """
+    st = file_path.stat()
+    entry: Dict[str, object] = {
+        "hash": _fingerprint(file_path), "size": st.st_size, "mtime_ns": st.st_mtime_ns,
+    }
+    if metadata is not None:
+        entry["metadata"] = metadata
+    return entry
+
+
+def _pdf_cache_entry(pdf_path: Path) -> Dict[str, object]:
+    """Cache entry for a PDF whose pages are extracted by other tasks."""
+    return _cache_entry(pdf_path, _pdf_metadata(pdf_path))
+
+
+def _pdf_metadata(pdf_path: Path) -> Dict[str, object]:
+    """JSON-ready DocumentMetadata fields read from a PDF's info dictionary."""
+    with fitz.open(pdf_path) as doc:
+        return _document_metadata(doc, pdf_path)
+
+
+def _document_metadata(doc: fitz.Document, pdf_path: Path) -> Dict[str, object]:
+    """JSON-ready DocumentMetadata fields of an open PDF."""
+    # The conversion cache only keeps the info-dictionary fields, so skip
+    # the outline walk and page-label lookups
+    meta = PDFMetadataExtractor().extract_metadata_from_document(
+        doc, pdf_path.stat().st_size, include_toc=False, include_page_labels=False
+    ).to_document_metadata_dict(source=pdf_path.name)
+    for key in ("created_at", "modified_at"):
+        if meta.get(key) is not None:
+            meta[key] = meta[key].isoformat()
+    return meta
+
+
+def _pdf_page_count(pdf_path: Path) -> int:
+    """Page count of a PDF, or 0 if it can't be opened (the worker reports why)."""
+    try:
+        with fitz.open(pdf_path) as doc:
+            return doc.page_count
+    except Exception:
+        return 0
+
+
 def main():
     subjects_root = project_root / "data" / "subjects"
     if not subjects_root.exists():
@@ -53,47 +224,95 @@ def main():
         print("No subject directories found in", subjects_root)
         return
 
-    for subject_dir in subject_dirs:
-        txt_dir = subject_dir / "documents" / "txt"
-        txt_dir.mkdir(parents=True, exist_ok=True)
+    # One process per file: each worker opens its own document, so no
+    # PyMuPDF handle is ever shared between processes
+    with ProcessPoolExecutor(max_workers=min(os.cpu_count() or 1, 8)) as executor:
+        for subject_dir in subject_dirs:
+            _convert_subject(subject_dir, executor)
 
-        # Collect all PDFs and PPTX under this subject (including subfolders)
-        files = sorted(
-            f for f in subject_dir.rglob("*")
-            if f.is_file() and f.suffix.lower() in (".pdf", ".pptx")
-        )
+    print("\nDone! Txt files written under each subject's documents/txt/")
 
-        if not files:
-            print(f"⏭️  No PDF/PPTX in {subject_dir.name}")
-            continue
 
-        print(f"\n📁 {subject_dir.name}")
-        for file_path in files:
-            stem = file_path.stem
-            txt_path = txt_dir / f"{stem}.txt"
+def _convert_subject(subject_dir: Path, executor: ProcessPoolExecutor) -> None:
+    """Convert every PDF/PPTX under one subject directory in parallel."""
+    txt_dir = subject_dir / "documents" / "txt"
+    txt_dir.mkdir(parents=True, exist_ok=True)
 
-            ext = file_path.suffix.lower()
-            print(f"  📄 Converting: {file_path.name} ...", end=" ", flush=True)
+    # Collect all PDFs and PPTX under this subject (including subfolders)
+    files = sorted(
+        f for f in subject_dir.rglob("*")
+        if f.is_file() and f.suffix.lower() in (".pdf", ".pptx")
+    )
 
-            try:
-                if ext == ".pdf":
-                    text = extract_text_from_pdf(file_path)
-                elif ext == ".pptx":
-                    text = extract_text_from_pptx(file_path)
-                else:
-                    continue
+    if not files:
+        print(f"⏭️  No PDF/PPTX in {subject_dir.name}")
+        return
 
-                if not text.strip():
-                    print("⚠️  No text extracted!")
-                    continue
+    print(f"\n📁 {subject_dir.name}")
+    cache_path = txt_dir / CACHE_FILENAME
+    cache = _load_cache(cache_path)
+
+    # Whole files and page ranges of long PDFs share one flat task pool;
+    # range results are collected here until their file is complete.  The
+    # last part of a split PDF is its cache entry, built by its own task
+    futures = {}
+    page_ranges: Dict[Path, Optional[List[object]]] = {}
+    backfills = {}
+    for file_path in files:
+        txt_path = txt_dir / f"{file_path.stem}.txt"
+        entry = cache.get(file_path.stem)
+        if _is_unchanged(file_path, txt_path, entry):
+            if file_path.suffix.lower() == ".pdf" and "metadata" not in entry:
+                # Entry predates the stored metadata; fill it in
+                backfills[executor.submit(_pdf_metadata, file_path)] = (file_path, entry)
+            print(f"  ⏭️  {file_path.name}: unchanged")
+            continue
+        page_count = _pdf_page_count(file_path) if file_path.suffix.lower() == ".pdf" else 0
+        if page_count < PAGE_SPLIT_THRESHOLD:
+            futures[executor.submit(_convert_one, file_path, txt_path)] = (file_path, txt_path, None)
+            continue
+        starts = range(0, page_count, PAGES_PER_TASK)
+        page_ranges[file_path] = [None] * (len(starts) + 1)
+        for n, start in enumerate(starts):
+            end = min(start + PAGES_PER_TASK, page_count)
+            future = executor.submit(_extract_page_range, file_path, start, end)
+            futures[future] = (file_path, txt_path, n)
+        futures[executor.submit(_pdf_cache_entry, file_path)] = (file_path, txt_path, len(starts))
 
-                txt_path.write_text(text, encoding="utf-8")
-                word_count = len(text.split())
-                print(f"✅ {word_count:,} words → {txt_path.name}")
+    # Report each file as soon as its last task finishes
+    for future in as_completed(futures):
+        file_path, txt_path, part = futures[future]
+        if part is None:
+            word_count, error, entry = future.result()
+        else:
+            parts = page_ranges[file_path]
+            if parts is None:
+                continue  # an earlier task of this file already failed
+            try:
+                parts[part] = future.result()
+                if any(p is None for p in parts):
+                    continue
+                *ranges, entry = parts
+                pages = [page for pages in ranges for page in pages]
+                word_count, error = _save_pages(pages, txt_path), None
             except Exception as e:
-                print(f"❌ Error: {e}")
+                page_ranges[file_path] = None
+                word_count, error = None, str(e)
+        if error is not None:
+            print(f"  📄 {file_path.name}: ❌ Error: {error}")
+        elif word_count is None:
+            print(f"  📄 {file_path.name}: ⚠️  No text extracted!")
+        else:
+            print(f"  📄 {file_path.name}: ✅ {word_count:,} words → {txt_path.name}")
+            cache[file_path.stem] = entry
 
-    print("\nDone! Txt files written under each subject's documents/txt/")
+    for future, (file_path, entry) in backfills.items():
+        try:
+            entry["metadata"] = future.result()
+        except Exception as e:
+            print(f"  📄 {file_path.name}: ⚠️  Could not read metadata: {e}")
+
+    _save_cache(cache_path, cache)
 
 
 if __name__ == "__main__":
@@ -19,11 +19,10 @@ import zipfile
 import tempfile
 import shutil
 import re
-import gc
-import psutil
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Tuple
+from typing import Iterable, List, Dict, Any, Optional, Tuple
 import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 # Add project root to path
 project_root = Path(__file__).parent.parent
@@ -31,6 +30,13 @@ sys.path.insert(0, str(project_root))
 
 import fitz  # PyMuPDF
 
+try:
+    # orjson parses straight from bytes and is several times faster on
+    # large document arrays; the stdlib parser accepts bytes too
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
 from core.config import Settings, apply_subject, subject_documents_dir
 from core.database.qdrant_client import QdrantManager
 from core.database.document_store import DocumentStore
@@ -55,12 +61,6 @@ console = Console()
 _pdf_extractor = PDFMetadataExtractor()
 
 
-def extract_text_from_pdf(pdf_path: Path) -> Tuple[str, int]:
-    """Extract text from a PDF file using PyMuPDF. Returns (text, page_count)."""
-    text, meta = _pdf_extractor.extract_text_and_metadata(pdf_path)
-    return text, meta.page_count
-
-
 def extract_text_and_metadata_from_pdf(pdf_path: Path) -> Tuple[str, Dict[str, Any]]:
     """Extract text and full metadata from a PDF file.
 
@@ -75,6 +75,10 @@ def extract_text_and_metadata_from_pdf(pdf_path: Path) -> Tuple[str, Dict[str, A
 # Archive handling
 # ---------------------------------------------------------------------------
 
+# Member names listed per archive in the extraction summary
+UNZIP_LISTED_MEMBERS = 5
+
+
 def unzip_archives(documents_dir: Path, extract_dir: Path) -> List[Path]:
     """Unzip all .zip files into extract_dir, return list of extracted files."""
     extracted_files = []
@@ -83,27 +87,57 @@ def unzip_archives(documents_dir: Path, extract_dir: Path) -> List[Path]:
     for zf in zip_files:
         console.print(f"  📦 Unzipping: [cyan]{zf.name}[/cyan]")
         with zipfile.ZipFile(zf, 'r') as z:
+            # Extract to flat directory to avoid nested paths; when two
+            # members flatten to the same name the later one wins, as it
+            # did when they were written one after the other
+            targets: Dict[Path, str] = {}
             for member in z.namelist():
                 # Skip macOS resource forks and directories
                 if member.startswith("__MACOSX") or member.endswith("/"):
                     continue
-                # Extract to flat directory to avoid nested paths
                 filename = Path(member).name
                 if not filename:
                     continue
-                target = extract_dir / filename
-                with z.open(member) as src, open(target, 'wb') as dst:
-                    dst.write(src.read())
-                extracted_files.append(target)
-                console.print(f"    └─ {filename}")
+                targets[extract_dir / filename] = member
+
+            # zlib releases the GIL while inflating, so members decompress
+            # in parallel; each thread opens its own member handle
+            with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+                futures = [
+                    executor.submit(_extract_member, z, member, target)
+                    for target, member in targets.items()
+                ]
+                for future, target in zip(futures, targets):
+                    future.result()
+                    extracted_files.append(target)
+
+            # One summary line per archive; a styled print per member
+            # dominates the run time on archives with many small files
+            if targets:
+                names = [target.name for target in targets]
+                sample = ", ".join(names[:UNZIP_LISTED_MEMBERS])
+                if len(names) > UNZIP_LISTED_MEMBERS:
+                    sample += f", … (+{len(names) - UNZIP_LISTED_MEMBERS} more)"
+                console.print(
+                    f"    └─ {len(names)} files: {sample}", markup=False, highlight=False
+                )
 
     return extracted_files
 
 
+def _extract_member(z: zipfile.ZipFile, member: str, target: Path) -> None:
+    """Stream one archive member to ``target`` in 1 MiB blocks."""
+    with z.open(member) as src, open(target, 'wb', buffering=1 << 20) as dst:
+        shutil.copyfileobj(src, dst, 1 << 20)
+
+
 # ---------------------------------------------------------------------------
 # Document discovery
 # ---------------------------------------------------------------------------
 
+# Written by convert_to_txt.py next to the .txt files it produces
+CONVERSION_CACHE_FILENAME = ".cache.json"
+
 def discover_documents(documents_dir: Path, extra_files: List[Path] = None) -> List[Dict[str, Any]]:
     """
     Discover all ingestible documents:
@@ -115,16 +149,9 @@ def discover_documents(documents_dir: Path, extra_files: List[Path] = None) -> L
     raw_docs: List[Dict[str, Any]] = []
     all_files: List[Path] = []
 
-    # Collect top-level files (non-zip) and recurse into subdirectories
-    for f in documents_dir.rglob("*"):
-        if f.is_file() and f.suffix.lower() != ".zip":
-            # Skip files inside the _extracted directory (handled separately)
-            try:
-                f.relative_to(documents_dir / "_extracted")
-                continue
-            except ValueError:
-                pass
-            all_files.append(f)
+    # Collect top-level files (non-zip) and recurse into subdirectories,
+    # skipping the _extracted directory (handled separately)
+    all_files.extend(_walk_files(str(documents_dir), str(documents_dir / "_extracted")))
 
     # Add extracted files
     if extra_files:
@@ -133,7 +160,68 @@ def discover_documents(documents_dir: Path, extra_files: List[Path] = None) -> L
     # Build set of text file stems so we can skip duplicate PDFs
     txt_stems = {f.stem for f in all_files if f.suffix.lower() in (".txt", ".md")}
 
-    for file_path in sorted(all_files):
+    # PDF extraction dominates discovery, so all PDFs are parsed up front in
+    # worker processes; results are consumed below in file order so the
+    # console output and document order stay the same.
+    pdf_paths = [
+        f for f in all_files
+        if f.suffix.lower() == ".pdf" and f.stem not in txt_stems
+    ]
+    with ProcessPoolExecutor(max_workers=max(1, min(os.cpu_count() or 1, 8, len(pdf_paths)))) as executor:
+        pdf_futures = {
+            file_path: executor.submit(extract_text_and_metadata_from_pdf, file_path)
+            for file_path in pdf_paths
+        }
+        _collect_documents(sorted(all_files), txt_stems, pdf_futures, raw_docs)
+
+    return raw_docs
+
+
+def _walk_files(directory: str, skip_dir: str) -> Iterable[Path]:
+    """Yield every non-zip file under ``directory``, except under ``skip_dir``.
+
+    Uses os.scandir, whose entries answer is_file()/is_dir() from the
+    directory listing itself, so no file is stat'ed; only the files kept
+    are wrapped in Path.  Dot entries are tool state (e.g.
+    convert_to_txt's .cache.json), not documents, and are skipped.
+    """
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            name = entry.name
+            if name.startswith("."):
+                continue
+            if entry.is_dir():
+                if entry.path != skip_dir:
+                    yield from _walk_files(entry.path, skip_dir)
+            elif entry.is_file() and not name.lower().endswith(".zip"):
+                yield Path(entry.path)
+
+
+def _read_text_file(file_path: Path) -> str:
+    """Read a UTF-8 text file with surrounding whitespace removed.
+
+    Decodes the raw bytes in one pass instead of streaming them through a
+    text-mode file object.  Line endings are normalised to ``\\n`` as text
+    mode would, but the replace only runs for files that contain a ``\\r``.
+    """
+    # The bytes are released as soon as they are decoded
+    text = file_path.read_bytes().decode("utf-8")
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    # strip() returns the same object when there is nothing to remove
+    return text.strip()
+
+
+def _collect_documents(
+    files: List[Path],
+    txt_stems: set,
+    pdf_futures: Dict[Path, Any],
+    raw_docs: List[Dict[str, Any]],
+) -> None:
+    """Build raw document dicts for ``files`` in order, appending to ``raw_docs``."""
+    # convert_to_txt cache per directory, loaded on first use
+    conversion_caches: Dict[Path, Dict[str, Any]] = {}
+    for file_path in files:
         ext = file_path.suffix.lower()
 
         if ext == ".pdf":
@@ -142,7 +230,7 @@ def discover_documents(documents_dir: Path, extra_files: List[Path] = None) -> L
                 console.print(f"  ⏭️  Skipping PDF (text version exists): {file_path.name}")
                 continue
             try:
-                text, pdf_meta = extract_text_and_metadata_from_pdf(file_path)
+                text, pdf_meta = pdf_futures[file_path].result()
                 if not text or len(text) < 50:
                     console.print(f"  ⚠️  Skipping (too little text): {file_path.name}")
                     continue
@@ -158,7 +246,7 @@ def discover_documents(documents_dir: Path, extra_files: List[Path] = None) -> L
                 meta = enrich_metadata(meta, file_path.name)
 
                 # Merge heuristic tags with any keywords from PDF metadata
-                existing_tags = meta.get("tags", [])
+                existing_tags = meta.get("tags") or []
                 guessed_tags = _guess_tags(file_path.name)
                 meta["tags"] = list(dict.fromkeys(existing_tags + guessed_tags))
 
@@ -179,8 +267,7 @@ def discover_documents(documents_dir: Path, extra_files: List[Path] = None) -> L
 
         elif ext == ".json":
             try:
-                with open(file_path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
+                data = _json_loads(file_path.read_bytes())
                 items = data if isinstance(data, list) else [data]
                 for item in items:
                     if "content" in item:
@@ -191,21 +278,31 @@ def discover_documents(documents_dir: Path, extra_files: List[Path] = None) -> L
 
         elif ext in (".txt", ".md"):
             try:
-                text = file_path.read_text(encoding="utf-8").strip()
+                text = _read_text_file(file_path)
                 if text:
                     doc_type = "markdown" if ext == ".md" else "text"
                     word_count = len(text.split())
-                    meta = {
-                        "title": file_path.stem,
-                        "source": file_path.name,
-                        "document_type": doc_type,
-                        "category": _guess_category(file_path.name),
-                        "word_count": word_count,
-                        "language": "en",
-                        "tags": _guess_tags(file_path.name),
-                    }
+                    # A .txt written by convert_to_txt carries its PDF's
+                    # metadata in the conversion cache, so the PDF itself
+                    # never has to be opened here
+                    pdf_meta = _converted_pdf_metadata(file_path, conversion_caches)
+                    if pdf_meta:
+                        meta = dict(pdf_meta)
+                        meta.setdefault("title", file_path.stem)
+                    else:
+                        meta = {
+                            "title": file_path.stem,
+                            "source": file_path.name,
+                            "document_type": doc_type,
+                        }
+                    meta["category"] = _guess_category(file_path.name)
+                    meta["word_count"] = word_count
+                    meta["language"] = "en"
                     # Enrich with citation registry data (APA metadata)
                     meta = enrich_metadata(meta, file_path.name)
+                    # Merge heuristic tags with any keywords from PDF metadata
+                    existing_tags = meta.get("tags") or []
+                    meta["tags"] = list(dict.fromkeys(existing_tags + _guess_tags(file_path.name)))
                     raw_docs.append({
                         "content": text,
                         "metadata": meta,
@@ -214,39 +311,60 @@ def discover_documents(documents_dir: Path, extra_files: List[Path] = None) -> L
             except Exception as e:
                 console.print(f"  ❌ Text failed: {file_path.name}: {e}")
 
-    return raw_docs
+
+def _converted_pdf_metadata(
+    txt_path: Path, caches: Dict[Path, Dict[str, Any]]
+) -> Optional[Dict[str, Any]]:
+    """PDF metadata convert_to_txt recorded for ``txt_path``, or None."""
+    directory = txt_path.parent
+    if directory not in caches:
+        try:
+            caches[directory] = _json_loads((directory / CONVERSION_CACHE_FILENAME).read_bytes())
+        except (OSError, ValueError):
+            caches[directory] = {}
+    entry = caches[directory].get(txt_path.stem)
+    return entry.get("metadata") if isinstance(entry, dict) else None
+
+
+# Filename keyword tables, one alternation per category / tag, matched
+# against the lower-cased filename; the first category that matches wins
+_CATEGORY_PATTERNS = [
+    (re.compile(r"scrum|kanban|agile|xp"), "agile-methodologies"),
+    (re.compile(r"testing|crispin|gregory"), "software-testing"),
+    (re.compile(r"sommerville|software engineering"), "software-engineering"),
+    (re.compile(r"cohn|user stor"), "requirements-engineering"),
+    (
+        re.compile(r"meyer|becker|babb|stray|runeson|waterman|dingsøyr|dingsoyr"),
+        "research-articles",
+    ),
+]
+
+# Tags in the order they are reported. Each keyword is checked on its
+# own, so keywords that overlap or prefix one another all still match
+_TAG_KEYWORDS = {
+    "agile": "agile", "scrum": "scrum", "kanban": "kanban", "xp": "xp",
+    "test": "testing",
+    "software engineering": "software-engineering",
+    "user stor": "user-stories", "requirements": "requirements",
+    "chapter": "textbook-chapter",
+}
 
 
 def _guess_category(filename: str) -> str:
     """Guess a category from the filename."""
     name = filename.lower()
-    if any(w in name for w in ["scrum", "kanban", "agile", "xp"]):
-        return "agile-methodologies"
-    if any(w in name for w in ["testing", "crispin", "gregory"]):
-        return "software-testing"
-    if any(w in name for w in ["sommerville", "software engineering"]):
-        return "software-engineering"
-    if any(w in name for w in ["cohn", "user stor"]):
-        return "requirements-engineering"
-    if any(w in name for w in ["meyer", "becker", "babb", "stray", "runeson", "waterman", "dingsøyr", "dingsoyr"]):
-        return "research-articles"
+    for pattern, category in _CATEGORY_PATTERNS:
+        if pattern.search(name):
+            return category
     return "general"
 
 
 def _guess_tags(filename: str) -> List[str]:
     """Guess tags from the filename."""
-    tags = []
     name = filename.lower()
-    keyword_map = {
-        "agile": "agile", "scrum": "scrum", "kanban": "kanban", "xp": "xp",
-        "testing": "testing", "test": "testing",
-        "software engineering": "software-engineering",
-        "user stor": "user-stories", "requirements": "requirements",
-        "chapter": "textbook-chapter",
-    }
-    for keyword, tag in keyword_map.items():
-        if keyword in name:
-            tags.append(tag)
+    tags = list(dict.fromkeys(
+        tag for keyword, tag in _TAG_KEYWORDS.items() if keyword in name
+    ))
     return tags if tags else ["document"]
 
 
@@ -254,8 +372,20 @@ def _guess_tags(filename: str) -> List[str]:
 # Ingestion
 # ---------------------------------------------------------------------------
 
+# Documents embedded in one batch call and written in one bulk upsert
+INGEST_BATCH_DOCUMENTS = 64
+
+# Document batches whose embedding requests may be in flight at once
+EMBED_CONCURRENCY = 4
+
+
 async def ingest_all(raw_docs: List[Dict[str, Any]], settings: Settings) -> Dict[str, Any]:
-    """Ingest all documents into Qdrant with progress display."""
+    """Ingest all documents into Qdrant with progress display.
+
+    ``raw_docs`` is consumed: it is emptied once the documents are built,
+    and each batch of documents is released as soon as it is written, so
+    chunk texts don't accumulate over the whole run.
+    """
     qdrant = QdrantManager(settings)
     embedding_service = EmbeddingService(settings)
     document_store = DocumentStore(qdrant, settings)
@@ -279,10 +409,10 @@ async def ingest_all(raw_docs: List[Dict[str, Any]], settings: Settings) -> Dict
             documents.append(doc)
         except Exception as e:
             console.print(f"  ⚠️  Skipping invalid doc: {e}")
+    raw_docs.clear()
 
     # Cost estimate
-    contents = [d.content for d in documents]
-    cost = embedding_service.estimate_cost(contents)
+    cost = embedding_service.estimate_cost([d.content for d in documents])
     console.print(f"📊 Total tokens: [cyan]{cost['total_tokens']:,}[/cyan]  |  "
                   f"Estimated cost: [cyan]${cost['estimated_cost_usd']:.4f}[/cyan]  |  "
                   f"Batches: [cyan]{cost['batch_count']}[/cyan]\n")
@@ -292,6 +422,8 @@ async def ingest_all(raw_docs: List[Dict[str, Any]], settings: Settings) -> Dict
     total_chunks = 0
     start_time = time.time()
 
+    semaphore = asyncio.Semaphore(EMBED_CONCURRENCY)
+
     with Progress(
         SpinnerColumn(),
         TextColumn("[progress.description]{task.description}"),
@@ -302,39 +434,67 @@ async def ingest_all(raw_docs: List[Dict[str, Any]], settings: Settings) -> Dict
     ) as progress:
         task = progress.add_task("Ingesting documents...", total=len(documents))
 
-        # Process one-by-one to give clear feedback
-        for i, doc in enumerate(documents):
-            title = doc.metadata.title or f"Document {i+1}"
+        # Only the batches hold the documents from here on; each one is
+        # freed when its coroutine finishes
+        batches = [
+            (start, documents[start:start + INGEST_BATCH_DOCUMENTS])
+            for start in range(0, len(documents), INGEST_BATCH_DOCUMENTS)
+        ]
+        del documents
+
+        async def process(start: int, batch: List[Document]) -> None:
+            nonlocal successful, failed, total_chunks
+            titles = [
+                doc.metadata.title or f"Document {start + j + 1}"
+                for j, doc in enumerate(batch)
+            ]
             try:
-                # Embed document (main + chunks)
-                main_emb, chunk_embs = await embedding_service.embed_document_with_chunks(doc.content)
-
-                # If chunks were created, store the chunk texts on the document
-                chunk_embeddings = None
-                if chunk_embs:
-                    doc.chunks = embedding_service.chunk_text(doc.content)
-                    chunk_embeddings = [ce.embedding for ce in chunk_embs]
-                    total_chunks += len(chunk_embs)
-
-                # Ingest
-                result = document_store.ingest_document(
-                    document=doc,
-                    embedding=main_emb.embedding,
+                async with semaphore:
+                    # Embed every document (main + chunks) in one batch call
+                    embedded = await embedding_service.embed_documents_with_chunks(
+                        [doc.content for doc in batch]
+                    )
+
+                embeddings = []
+                chunk_embeddings = []
+                for doc, (main_emb, chunk_embs) in zip(batch, embedded):
+                    # If chunks were created, store the chunk texts on the document
+                    if chunk_embs:
+                        doc.chunks = embedding_service.chunk_text(doc.content)
+                        chunk_embeddings.append([ce.embedding for ce in chunk_embs])
+                        total_chunks += len(chunk_embs)
+                    else:
+                        chunk_embeddings.append(None)
+                    embeddings.append(main_emb.embedding)
+
+                # The upsert runs on a worker thread so embedding continues meanwhile
+                results = await asyncio.to_thread(
+                    document_store.ingest_documents_batch,
+                    documents=batch,
+                    embeddings=embeddings,
                     chunk_embeddings=chunk_embeddings,
                 )
-
-                if result.success:
-                    chunks_info = f" (+{result.chunk_count} chunks)" if result.chunk_count else ""
-                    console.print(f"  ✅ {title}{chunks_info}")
-                    successful += 1
-                else:
-                    console.print(f"  ❌ {title}: {result.message}")
-                    failed += 1
+                for title, result in zip(titles, results):
+                    if result.success:
+                        chunks_info = f" (+{result.chunk_count} chunks)" if result.chunk_count else ""
+                        console.print(f"  ✅ {title}{chunks_info}")
+                        successful += 1
+                    else:
+                        console.print(f"  ❌ {title}: {result.message}")
+                        failed += 1
             except Exception as e:
-                console.print(f"  ❌ {title}: {e}")
-                failed += 1
+                for title in titles:
+                    console.print(f"  ❌ {title}: {e}")
+                failed += len(batch)
 
-            progress.update(task, advance=1)
+            # Coroutines share the event loop thread, so no locking is needed
+            progress.update(task, advance=len(batch))
+
+        # Up to EMBED_CONCURRENCY batches embed at once while earlier
+        # batches are upserted
+        coroutines = [process(start, batch) for start, batch in batches]
+        del batches
+        await asyncio.gather(*coroutines)
 
     elapsed = time.time() - start_time
 
@@ -438,4 +598,10 @@ async def main():
 
 
 if __name__ == "__main__":
-    exit(asyncio.run(main()))
+    # uvloop's libuv event loop schedules awaits and socket I/O with less
+    # overhead than the default loop; it is optional and Unix-only
+    try:
+        from uvloop import run as _run
+    except ImportError:
+        _run = asyncio.run
+    exit(_run(main()))
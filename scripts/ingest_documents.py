@@ -12,19 +12,39 @@ import json
 import asyncio
 import logging
 import argparse
+import mmap
+import hashlib
 import re
+import stat
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Tuple
+from typing import Iterator, List, Dict, Any, Optional, Set, Tuple
 import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from itertools import chain, compress
 from datetime import datetime
 
 # Add the project root to the Python path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
+try:
+    # orjson parses from and serializes to bytes several times faster
+    # than the stdlib; both parsers accept bytes
+    import orjson
+    _json_loads = orjson.loads
+
+    def _json_line(obj: Any) -> bytes:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_APPEND_NEWLINE)
+except ImportError:
+    _json_loads = json.loads
+
+    def _json_line(obj: Any) -> bytes:
+        return (json.dumps(obj, default=str) + "\n").encode("utf-8")
+
 from core.config import Settings, apply_subject
 from core.database.qdrant_client import QdrantManager
-from core.database.document_store import DocumentStore
+from core.database.document_store import DocumentStore, IngestionResult
 from core.services.embedding_service import EmbeddingService
 from core.models.document import Document, DocumentMetadata, DocumentType
 from core.parsers.pdf import PDFMetadataExtractor
@@ -35,6 +55,17 @@ from rich.table import Table
 from rich.panel import Panel
 
 
+# Threads reading files in load_documents_from_directory
+DIRECTORY_READ_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+
+# Text files at least this large are decoded from a memory map; below it
+# the mapping setup costs more than the copy it saves
+MMAP_MIN_BYTES = 4_000_000
+
+# Ingests of more documents than this defer HNSW indexing until the end
+LARGE_INGEST_DOCUMENTS = 5000
+
+
 def setup_logging(log_level: str = "INFO"):
     """Setup logging configuration."""
     logging.basicConfig(
@@ -47,31 +78,53 @@ def setup_logging(log_level: str = "INFO"):
     )
 
 
+# Match "--- Page N ---" or "--- Slide N ---" (convert slides to page numbers)
+_PAGE_MARKER_RE = re.compile(r"^--- (?:Page|Slide) (\d+) ---\s*", re.MULTILINE | re.IGNORECASE)
+_PAGE_MARKER_PREFIX = "--- "
+
+
 def parse_page_markers(content: str) -> Optional[List[Tuple[int, str]]]:
     """Parse '--- Page N ---' or '--- Slide N ---' markers in text.
 
     Returns a list of (page_number, page_text) for page-aware chunking, or None
     if no markers are found (so ingestion uses normal chunking without page numbers).
     """
-    # Match "--- Page N ---" or "--- Slide N ---" (convert slides to page numbers)
-    pattern = re.compile(r"^--- (?:Page|Slide) (\d+) ---\s*", re.MULTILINE | re.IGNORECASE)
-    matches = list(pattern.finditer(content))
-    if not matches:
+    # Every marker starts with this literal; the substring search runs at
+    # memchr speed, so text without markers never reaches the regex engine
+    if _PAGE_MARKER_PREFIX not in content:
+        return None
+    # split() with a capturing group yields [preamble, num1, body1, num2, body2, ...]
+    # in a single scan; text before the first marker is dropped.
+    parts = _PAGE_MARKER_RE.split(content)
+    if len(parts) == 1:
         return None
-    page_list = []
-    for i, m in enumerate(matches):
-        page_num = int(m.group(1))
-        start = m.end()
-        end = matches[i + 1].start() if i + 1 < len(matches) else len(content)
-        page_text = content[start:end].strip()
-        page_list.append((page_num, page_text))
-    return page_list if page_list else None
+    return [(int(parts[i]), parts[i + 1].strip()) for i in range(1, len(parts), 2)]
+
+
+def _read_text(file_path: Path, size: Optional[int] = None) -> str:
+    """Read a UTF-8 text file in one read and decode it.
+
+    Equivalent to ``open(file_path, encoding='utf-8').read()`` (including
+    universal-newline translation) without the buffered text-reader overhead.
+    Files of at least ``MMAP_MIN_BYTES`` are memory-mapped and decoded
+    straight from the mapping, so the raw bytes never land on the heap.
+    Pass ``size`` when the caller has already stat()ed the file.
+    """
+    if size is None:
+        size = file_path.stat().st_size
+    if size >= MMAP_MIN_BYTES:
+        with open(file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            content = str(mm, "utf-8")
+    else:
+        content = file_path.read_bytes().decode("utf-8")
+    if "\r" in content:
+        content = content.replace("\r\n", "\n").replace("\r", "\n")
+    return content
 
 
 def load_documents_from_json(file_path: Path) -> List[Dict[str, Any]]:
     """Load documents from JSON file."""
-    with open(file_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    data = _json_loads(file_path.read_bytes())
     
     # Handle both single document and array of documents
     if isinstance(data, dict):
@@ -83,48 +136,68 @@ def load_documents_from_json(file_path: Path) -> List[Dict[str, Any]]:
 
 
 def load_documents_from_directory(directory: Path) -> List[Dict[str, Any]]:
-    """Load documents from directory containing text files."""
+    """Load documents from directory containing text files.
+
+    Files are read on a thread pool (file reads release the GIL, so disk
+    latency overlaps across files); results keep the directory walk order.
+    """
+    file_paths = [
+        file_path for file_path in directory.rglob("*")
+        # Dotfiles are tool state (e.g. convert_to_txt's .cache.json), not documents
+        if not file_path.name.startswith('.')
+        and file_path.suffix.lower() in ('.txt', '.md', '.json')
+        and file_path.is_file()
+    ]
+
     documents = []
-    
-    for file_path in directory.rglob("*"):
-        if file_path.is_file() and file_path.suffix.lower() in ['.txt', '.md', '.json']:
+    with ThreadPoolExecutor(max_workers=DIRECTORY_READ_WORKERS) as executor:
+        for file_path, future in zip(
+            file_paths, [executor.submit(_load_directory_file, p) for p in file_paths]
+        ):
             try:
-                if file_path.suffix.lower() == '.json':
-                    docs = load_documents_from_json(file_path)
-                    documents.extend(docs)
-                else:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                    
-                    # Create document metadata
-                    doc_type = DocumentType.MARKDOWN if file_path.suffix.lower() == '.md' else DocumentType.TEXT
-                    
-                    meta = {
-                        "title": file_path.stem,
-                        "source": str(file_path),
-                        "document_type": doc_type,
-                        "file_size": file_path.stat().st_size
-                    }
-                    # Enrich with citation registry data (APA metadata)
-                    meta = enrich_metadata(meta, file_path.name)
-
-                    doc_dict = {"content": content, "metadata": meta}
-                    # Parse page markers (e.g. from convert_to_txt.py) for page-aware chunking
-                    page_list = parse_page_markers(content)
-                    if page_list:
-                        doc_dict["page_list"] = page_list
-                    documents.append(doc_dict)
+                documents.extend(future.result())
             except Exception as e:
                 logging.warning(f"Failed to load {file_path}: {e}")
     
     return documents
 
 
+def _load_directory_file(file_path: Path) -> List[Dict[str, Any]]:
+    """Load the document(s) in one file found by load_documents_from_directory."""
+    if file_path.suffix.lower() == '.json':
+        return load_documents_from_json(file_path)
+
+    file_size = file_path.stat().st_size
+    content = _read_text(file_path, size=file_size)
+    
+    # Create document metadata
+    doc_type = DocumentType.MARKDOWN if file_path.suffix.lower() == '.md' else DocumentType.TEXT
+    
+    meta = {
+        "title": file_path.stem,
+        "source": str(file_path),
+        "document_type": doc_type,
+        "file_size": file_size
+    }
+    # Enrich with citation registry data (APA metadata)
+    meta = enrich_metadata(meta, file_path.name)
+
+    doc_dict = {"content": content, "metadata": meta}
+    # Parse page markers (e.g. from convert_to_txt.py) for page-aware chunking
+    page_list = parse_page_markers(content)
+    if page_list:
+        doc_dict["page_list"] = page_list
+    return [doc_dict]
+
+
 def load_single_file(file_path: Path, title: str = None, category: str = None) -> List[Dict[str, Any]]:
     """Load a single document file (.txt, .md, .json, or .pdf)."""
-    if not file_path.exists():
-        raise FileNotFoundError(f"File not found: {file_path}")
-    if not file_path.is_file():
+    # One stat() serves the existence, file-type and size checks
+    try:
+        file_stat = file_path.stat()
+    except FileNotFoundError:
+        raise FileNotFoundError(f"File not found: {file_path}") from None
+    if not stat.S_ISREG(file_stat.st_mode):
         raise ValueError(f"Path is not a file: {file_path}")
 
     suffix = file_path.suffix.lower()
@@ -142,7 +215,10 @@ def load_single_file(file_path: Path, title: str = None, category: str = None) -
 
     if suffix == '.pdf':
         extractor = PDFMetadataExtractor()
-        content, page_list, pdf_meta = extractor.extract_text_and_metadata_by_page(file_path)
+        # Long PDFs are extracted in page ranges across all cores
+        content, page_list, pdf_meta = extractor.extract_text_and_metadata_by_page(
+            file_path, workers=os.cpu_count() or 1
+        )
 
         if not content.strip():
             raise ValueError(f"No extractable text found in PDF: {file_path}")
@@ -170,8 +246,7 @@ def load_single_file(file_path: Path, title: str = None, category: str = None) -
             f"Unsupported file type '{suffix}'. Supported: .txt, .md, .json, .pdf"
         )
 
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
+    content = _read_text(file_path, size=file_stat.st_size)
 
     doc_type = DocumentType.MARKDOWN if suffix == '.md' else DocumentType.TEXT
 
@@ -179,7 +254,7 @@ def load_single_file(file_path: Path, title: str = None, category: str = None) -
         "title": title or file_path.stem,
         "source": str(file_path.resolve()),
         "document_type": doc_type,
-        "file_size": file_path.stat().st_size,
+        "file_size": file_stat.st_size,
         "category": category,
     }
     # Enrich with citation registry data (APA metadata)
@@ -195,53 +270,81 @@ def load_single_file(file_path: Path, title: str = None, category: str = None) -
 
 # --- Ingestion log -----------------------------------------------------------
 
-INGESTION_LOG_PATH = Path(__file__).parent.parent / "data" / "ingestion_log.json"
+INGESTION_LOG_PATH = Path(__file__).parent.parent / "data" / "ingestion_log.jsonl"
 
 
-def _load_ingestion_log() -> List[Dict[str, Any]]:
-    """Load the ingestion log from disk."""
+def _load_ingestion_log() -> Iterator[Dict[str, Any]]:
+    """Yield the ingestion log entries from disk, oldest first."""
     if INGESTION_LOG_PATH.exists():
-        with open(INGESTION_LOG_PATH, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return []
+        with open(INGESTION_LOG_PATH, "rb") as f:
+            for line in f:
+                if line.strip():
+                    yield _json_loads(line)
+
 
+def _append_ingestion_log(entries: List[Dict[str, Any]]) -> None:
+    """Append entries to the ingestion log, one JSON object per line.
 
-def _save_ingestion_log(log: List[Dict[str, Any]]) -> None:
-    """Persist the ingestion log to disk."""
+    The existing history is never read or rewritten.
+    """
     INGESTION_LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with open(INGESTION_LOG_PATH, "w", encoding="utf-8") as f:
-        json.dump(log, f, indent=2, default=str)
+    with open(INGESTION_LOG_PATH, "ab") as f:
+        f.writelines(_json_line(entry) for entry in entries)
+
+
+def _content_sha256(content: str) -> str:
+    """Hex SHA-256 of a document's content, as recorded in the ingestion log."""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
 
+def ingested_content_hashes(collection: str) -> Set[str]:
+    """Content hashes of the documents already logged as ingested into ``collection``."""
+    return {
+        entry["content_sha256"]
+        for entry in _load_ingestion_log()
+        if entry.get("collection") == collection and "content_sha256" in entry
+    }
 
-def record_ingestion(documents: List, all_results: List[Dict[str, Any]], batch_size: int) -> int:
+
+def record_ingestion(
+    documents: List,
+    all_results: List[Dict[str, Any]],
+    batch_size: int,
+    collection: Optional[str] = None,
+    content_hashes: Optional[List[str]] = None,
+) -> int:
     """Append successfully ingested documents to the ingestion log.
 
-    Returns the number of new entries added.
+    Each entry records the content hash and target collection, so later
+    runs can skip documents that are already ingested.  Pass
+    ``content_hashes`` (parallel to ``documents``) to reuse hashes that
+    are already known.  Returns the number of new entries added.
     """
-    log = _load_ingestion_log()
-    added = 0
-
-    doc_offset = 0
-    for batch in all_results:
-        for res in batch["results"]:
-            doc = documents[doc_offset]
-            doc_offset += 1
-            if not res.success:
-                continue
-            log.append({
-                "document_id": res.document_id,
-                "title": doc.metadata.title or res.document_id,
-                "source": doc.metadata.source,
-                "category": doc.metadata.category,
-                "document_type": str(doc.metadata.document_type),
-                "token_count": res.token_count,
-                "chunk_count": res.chunk_count,
-                "ingested_at": datetime.now().isoformat(),
-            })
-            added += 1
-
-    _save_ingestion_log(log)
-    return added
+    if content_hashes is None:
+        content_hashes = [_content_sha256(doc.content) for doc in documents]
+    # One timestamp for the whole run rather than a clock read per entry
+    ingested_at = datetime.now().isoformat()
+    results = chain.from_iterable(batch["results"] for batch in all_results)
+
+    entries = [
+        {
+            "document_id": res.document_id,
+            "title": doc.metadata.title or res.document_id,
+            "source": doc.metadata.source,
+            "category": doc.metadata.category,
+            "document_type": str(doc.metadata.document_type),
+            "token_count": res.token_count,
+            "chunk_count": res.chunk_count,
+            "collection": collection,
+            "content_sha256": content_sha256,
+            "ingested_at": ingested_at,
+        }
+        for doc, content_sha256, res in zip(documents, content_hashes, results)
+        if res.success
+    ]
+
+    _append_ingestion_log(entries)
+    return len(entries)
 
 
 def create_sample_documents() -> List[Dict[str, Any]]:
@@ -305,72 +408,105 @@ def create_sample_documents() -> List[Dict[str, Any]]:
     ]
 
 
-async def ingest_documents_batch(
+async def embed_documents_batch(
     documents: List[Document],
-    document_store: DocumentStore,
-    embedding_service: EmbeddingService,
-    console: Console,
-    progress: Progress,
-    task_id: TaskID
-) -> Dict[str, Any]:
-    """Ingest a batch of documents."""
-    start_time = time.time()
-    
-    # Process documents with chunking and embedding
-    ingestion_results = []
+    embedding_service: EmbeddingService
+) -> Tuple[List[List[float]], List[Optional[List[List[float]]]], int]:
+    """Chunk and embed a batch of documents.
+
+    Returns ``(embeddings, chunk_embeddings, total_tokens)`` with one main
+    embedding and one list of chunk embeddings (or None) per document,
+    ready for upsert_documents_batch.
+    """
     total_tokens = 0
-    total_chunks = 0
     
-    for i, document in enumerate(documents):
-        chunk_embeddings = None
-        chunk_size = embedding_service.settings.chunk_size_tokens
-        overlap = embedding_service.settings.chunk_overlap_tokens
+    chunk_size = embedding_service.settings.chunk_size_tokens
+    overlap = embedding_service.settings.chunk_overlap_tokens
 
-        # Build page-aware chunks for PDFs when page_list is available
+    # Chunk the whole batch with one tokenizer pass: every page of a
+    # page-aware document and every other document's content, in order
+    texts: List[str] = []
+    owners: List[Tuple[int, Optional[int]]] = []  # (document index, page number)
+    for i, document in enumerate(documents):
         if document.page_list:
-            chunks = []
-            chunk_metadata = []
             for (page_num, page_text) in document.page_list:
-                if not page_text.strip():
-                    continue
-                page_chunks = embedding_service.chunk_text(
-                    page_text, chunk_size=chunk_size, overlap=overlap
-                )
-                for c in page_chunks:
-                    chunks.append(c)
-                    chunk_metadata.append({"page_number": page_num})
+                if page_text.strip():
+                    texts.append(page_text)
+                    owners.append((i, page_num))
+        else:
+            texts.append(document.content)
+            owners.append((i, None))
+    doc_chunks: List[List[str]] = [[] for _ in documents]
+    doc_chunk_metadata: List[List[Dict[str, Any]]] = [[] for _ in documents]
+    for (i, page_num), chunks in zip(
+        owners, embedding_service.chunk_texts(texts, chunk_size=chunk_size, overlap=overlap)
+    ):
+        doc_chunks[i].extend(chunks)
+        if page_num is not None:
+            # One read-only dict shared by all chunks of the page
+            doc_chunk_metadata[i].extend([{"page_number": page_num}] * len(chunks))
+
+    # Lay all chunks out in one flat list, remembering where each
+    # document's chunks start and end
+    flat_chunks: List[str] = []
+    offsets: List[Tuple[int, int]] = []
+    for document, chunks, chunk_metadata in zip(documents, doc_chunks, doc_chunk_metadata):
+        # Page-aware chunks for PDFs when page_list is available
+        if document.page_list:
             document.chunks = chunks
             document.chunk_metadata = chunk_metadata
-        else:
-            chunks = embedding_service.chunk_text(
-                document.content, chunk_size=chunk_size, overlap=overlap
-            )
-            if len(chunks) > 1:
-                document.chunks = chunks
+        elif len(chunks) > 1:
+            document.chunks = chunks
 
+        # Single-chunk documents are embedded whole
         chunks = document.chunks if document.chunks else [document.content]
-
-        if len(chunks) > 1:
-            chunk_embedding_results = await embedding_service.create_embeddings_batch(chunks)
-            chunk_embeddings = [result.embedding for result in chunk_embedding_results]
-            # Use the first chunk embedding as the main document embedding
-            main_embedding = chunk_embedding_results[0].embedding
-            token_count = sum(r.token_count for r in chunk_embedding_results)
-        else:
-            # Single chunk — embed the whole document once
-            embedding_result = await embedding_service.create_embedding(document.content)
-            main_embedding = embedding_result.embedding
-            token_count = embedding_result.token_count
-        
-        # Ingest document
-        result = document_store.ingest_document(
-            document=document,
-            embedding=main_embedding,
-            chunk_embeddings=chunk_embeddings
+        offsets.append((len(flat_chunks), len(flat_chunks) + len(chunks)))
+        flat_chunks.extend(chunks)
+
+    # One embedding call for the whole batch; the service splits it into
+    # API requests by size and token budget and runs them concurrently
+    embedding_results = await embedding_service.create_embeddings_batch(flat_chunks)
+
+    embeddings: List[List[float]] = []
+    chunk_embeddings: List[Optional[List[List[float]]]] = []
+    for start, end in offsets:
+        doc_results = embedding_results[start:end]
+        # Use the first chunk embedding as the main document embedding
+        embeddings.append(doc_results[0].embedding)
+        chunk_embeddings.append(
+            [result.embedding for result in doc_results] if len(doc_results) > 1 else None
         )
-        
-        ingestion_results.append(result)
-        total_tokens += token_count
+        total_tokens += sum(r.token_count for r in doc_results)
+
+    return embeddings, chunk_embeddings, total_tokens
+
+
+async def upsert_documents_batch(
+    documents: List[Document],
+    embeddings: List[List[float]],
+    chunk_embeddings: List[Optional[List[List[float]]]],
+    total_tokens: int,
+    start_time: float,
+    document_store: DocumentStore,
+    console: Console,
+    progress: Progress,
+    task_id: TaskID
+) -> Dict[str, Any]:
+    """Upsert an embedded batch of documents and summarize the outcome."""
+    total_chunks = 0
+
+    # Upsert the whole batch in one bulk call; it runs on a worker thread
+    # so other batches keep embedding meanwhile, and doesn't wait for
+    # Qdrant to finish indexing
+    ingestion_results = await asyncio.to_thread(
+        document_store.ingest_documents_batch,
+        documents,
+        embeddings,
+        chunk_embeddings,
+        wait=False
+    )
+
+    for document, result in zip(documents, ingestion_results):
         total_chunks += result.chunk_count or 0
         
         # Update progress
@@ -395,6 +531,44 @@ async def ingest_documents_batch(
     }
 
 
+def failed_batch_result(
+    documents: List[Document],
+    error: Exception,
+    start_time: float,
+    console: Console,
+    progress: Progress,
+    task_id: TaskID
+) -> Dict[str, Any]:
+    """Summarize a batch whose embedding or upsert raised.
+
+    Every document gets a failed IngestionResult, so the batch lines up
+    with its documents like any other batch result.
+    """
+    processing_time = time.time() - start_time
+    results = [
+        IngestionResult(
+            success=False,
+            document_id=document.id or "unknown",
+            message=f"Ingestion failed: {error}",
+            processing_time=processing_time
+        )
+        for document in documents
+    ]
+    progress.update(task_id, advance=len(documents))
+    for document in documents:
+        console.print(f"  ❌ {document.metadata.title or document.id}: {error}")
+    
+    return {
+        "total": len(documents),
+        "successful": 0,
+        "failed": len(documents),
+        "total_tokens": 0,
+        "total_chunks": 0,
+        "processing_time": processing_time,
+        "results": results
+    }
+
+
 async def main():
     """Main ingestion function."""
     parser = argparse.ArgumentParser(description="Ingest documents into QdrantRAG-Pro")
@@ -438,6 +612,29 @@ async def main():
         default=10,
         help="Number of documents to process in each batch"
     )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-ingest documents whose content is already in the ingestion log"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=4,
+        help="Number of batches to embed and upsert concurrently"
+    )
+    parser.add_argument(
+        "--trust-input",
+        action="store_true",
+        help="Skip schema validation of documents from --data-path "
+             "(only for input that is known to be well-formed)"
+    )
+    parser.add_argument(
+        "--defer-index",
+        action="store_true",
+        help="Suspend HNSW indexing until all documents are upserted "
+             f"(automatic above {LARGE_INGEST_DOCUMENTS} documents)"
+    )
     parser.add_argument(
         "--log-level",
         default="INFO",
@@ -508,18 +705,48 @@ async def main():
             console.print("[yellow]⚠️  No documents found to ingest[/yellow]")
             return 0
         
-        # Convert to Document objects
+        # Convert to Document objects.  Metadata is always validated, since
+        # its validators normalise enums, tags, language and dates.  For
+        # trusted input (the built-in samples, or --trust-input for
+        # anything but --file) the Document wrapper skips validation and
+        # its content check is done here instead
+        trusted = args.create_sample or (args.trust_input and not args.file)
         documents = []
         for doc_data in raw_documents:
             metadata = DocumentMetadata(**doc_data.get("metadata", {}))
-            document = Document(
-                content=doc_data["content"],
-                metadata=metadata
-            )
+            if trusted:
+                content = doc_data["content"].strip()
+                if not content:
+                    raise ValueError("Document content cannot be empty")
+                document = Document.model_construct(content=content, metadata=metadata)
+            else:
+                document = Document(
+                    content=doc_data["content"],
+                    metadata=metadata
+                )
             if doc_data.get("page_list"):
                 document.page_list = doc_data["page_list"]
             documents.append(document)
         
+        # Hash each document once; the hashes pick out documents already
+        # ingested into this collection and are recorded in the log
+        content_hashes = [_content_sha256(doc.content) for doc in documents]
+        if not args.force:
+            seen = ingested_content_hashes(settings.qdrant_collection_name)
+            if seen:
+                keep = [h not in seen for h in content_hashes]
+                skipped = keep.count(False)
+                if skipped:
+                    console.print(
+                        f"⏭️  Skipping {skipped} unchanged document(s) already ingested "
+                        "(use --force to re-ingest)"
+                    )
+                    documents = list(compress(documents, keep))
+                    content_hashes = list(compress(content_hashes, keep))
+            if not documents:
+                console.print("[green]✅ Nothing new to ingest[/green]")
+                return 0
+        
         console.print(f"📊 Found {len(documents)} documents to process")
         
         # Estimate costs
@@ -543,18 +770,67 @@ async def main():
         with Progress(console=console) as progress:
             task = progress.add_task("Processing documents...", total=len(documents))
             
-            # Process in batches
+            # Pipeline the batches: up to --concurrency batches embed at
+            # a time and hand their vectors to a single upserting consumer
+            # through a bounded queue, so embedding and upserting overlap.
+            # Results are stored by batch number to keep the ingestion log
+            # in batch order.
             batch_size = args.batch_size
-            all_results = []
+            batch_count = (len(documents) - 1) // batch_size + 1
+            concurrency = max(1, args.concurrency)
+            semaphore = asyncio.Semaphore(concurrency)
+            queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency)
+            all_results: List[Dict[str, Any]] = [{}] * batch_count
+            failed_batches: List[int] = []
+            ingest_start = time.time()
             
-            for i in range(0, len(documents), batch_size):
-                batch = documents[i:i + batch_size]
-                console.print(f"\n📦 Processing batch {i//batch_size + 1}/{(len(documents)-1)//batch_size + 1}")
-                
-                batch_results = await ingest_documents_batch(
-                    batch, document_store, embedding_service, console, progress, task
-                )
-                all_results.append(batch_results)
+            async def embed_batch(number: int, batch: List[Document]) -> None:
+                start_time = time.time()
+                try:
+                    async with semaphore:
+                        console.print(f"\n📦 Processing batch {number}/{batch_count}")
+                        start_time = time.time()
+                        embedded = await embed_documents_batch(batch, embedding_service)
+                except Exception as e:
+                    # The consumer records the failure with the other results
+                    embedded = e
+                # Queue outside the semaphore so the next batch starts
+                # embedding while this one waits for the consumer
+                await queue.put((number, batch, embedded, start_time))
+            
+            async def upsert_batches() -> None:
+                for _ in range(batch_count):
+                    number, batch, embedded, start_time = await queue.get()
+                    try:
+                        if isinstance(embedded, Exception):
+                            raise embedded
+                        result = await upsert_documents_batch(
+                            batch, *embedded, start_time,
+                            document_store, console, progress, task
+                        )
+                    except Exception as e:
+                        logger.error(f"Batch {number}/{batch_count} failed: {e}", exc_info=e)
+                        failed_batches.append(number)
+                        result = failed_batch_result(batch, e, start_time, console, progress, task)
+                    all_results[number - 1] = result
+            
+            tasks = [asyncio.create_task(upsert_batches())] + [
+                asyncio.create_task(embed_batch(i // batch_size + 1, documents[i:i + batch_size]))
+                for i in range(0, len(documents), batch_size)
+            ]
+            try:
+                # Build the HNSW graph once at the end of a large ingest
+                # rather than incrementally alongside every upsert
+                defer_index = args.defer_index or len(documents) > LARGE_INGEST_DOCUMENTS
+                with qdrant_manager.deferred_indexing() if defer_index else nullcontext():
+                    await asyncio.gather(*tasks)
+            finally:
+                # Don't leave producers or the consumer running if
+                # anything escaped (e.g. the index toggle or a cancel)
+                for pipeline_task in tasks:
+                    pipeline_task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+            total_time = time.time() - ingest_start
         
         # Summary
         total_processed = sum(r["total"] for r in all_results)
@@ -562,7 +838,6 @@ async def main():
         total_failed = sum(r["failed"] for r in all_results)
         total_tokens = sum(r["total_tokens"] for r in all_results)
         total_chunks = sum(r["total_chunks"] for r in all_results)
-        total_time = sum(r["processing_time"] for r in all_results)
         
         summary_table = Table(title="Ingestion Summary")
         summary_table.add_column("Metric", style="cyan")
@@ -577,10 +852,19 @@ async def main():
         summary_table.add_row("Processing Time", f"{total_time:.2f}s")
         
         console.print(summary_table)
+        if failed_batches:
+            console.print(
+                f"[red]❌ Failed batches: {', '.join(map(str, sorted(failed_batches)))}"
+                f" of {batch_count} (see log for details)[/red]"
+            )
         
         # Update ingestion log
         if total_successful > 0:
-            added = record_ingestion(documents, all_results, args.batch_size)
+            added = record_ingestion(
+                documents, all_results, args.batch_size,
+                collection=settings.qdrant_collection_name,
+                content_hashes=content_hashes,
+            )
             console.print(
                 f"📝 Logged {added} document(s) to "
                 f"[cyan]{INGESTION_LOG_PATH.relative_to(project_root)}[/cyan]"
@@ -602,4 +886,10 @@ async def main():
 
 
 if __name__ == "__main__":
-    exit(asyncio.run(main()))
+    # uvloop's libuv event loop schedules awaits and socket I/O with less
+    # overhead than the default loop; it is optional and Unix-only
+    try:
+        from uvloop import run as _run
+    except ImportError:
+        _run = asyncio.run
+    exit(_run(main()))
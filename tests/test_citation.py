@@ -0,0 +1,155 @@
+"""
+Tests for the citation registry and APA formatting helpers.
+"""
+
+import pytest
+from core import citation
+from core.citation import (
+    CITATION_REGISTRY,
+    lookup_citation,
+    enrich_metadata,
+    format_apa_inline,
+    format_apa_reference,
+    build_citation_key,
+)
+
+
+class TestLookupCitation:
+    """Test filename to registry entry matching."""
+
+    def test_lookup_book_chapter(self):
+        """Test matching a book chapter by filename."""
+        citation = lookup_citation("Sommerville - Chapter 2 - Processes.pdf")
+
+        assert citation is not None
+        assert citation["author"] == "Sommerville, I."
+        assert citation["chapter"] == "2"
+        assert "pattern" not in citation
+
+    def test_lookup_is_case_insensitive(self):
+        """Test that registry patterns keep their (?i) flag."""
+        citation = lookup_citation("KANBAN AND SCRUM.pdf")
+
+        assert citation is not None
+        assert citation["title"] == "Kanban and Scrum: Making the Most of Both"
+
+    def test_lookup_no_match(self):
+        """Test that unknown filenames return None."""
+        assert lookup_citation("lecture_notes_week3.pdf") is None
+
+    def test_first_entry_wins(self):
+        """Test that the earliest registry entry wins when several match."""
+        # Matches both the Cohn (earlier) and Meyer (later) entries; the Meyer
+        # match starts earlier in the string but must not take precedence.
+        citation = lookup_citation("Meyer notes on Cohn chapter 1.pdf")
+
+        assert citation is not None
+        assert citation["author"] == "Cohn, M."
+
+    def test_every_entry_reachable(self):
+        """Test that each registry entry resolves to itself."""
+        samples = {
+            0: "sommerville chapter 1",
+            4: "cohn chapter 1",
+            7: "crispin and gregory chapter 10",
+            16: "Dingsoyr 2022",
+        }
+        for index, filename in samples.items():
+            expected = {k: v for k, v in CITATION_REGISTRY[index].items() if k != "pattern"}
+            assert lookup_citation(filename) == expected
+
+    def test_lookup_returns_copy(self):
+        """Test that mutating a result does not affect the registry."""
+        citation = lookup_citation("sommerville chapter 1")
+        citation["year"] = 1999
+
+        assert lookup_citation("sommerville chapter 1")["year"] == 2015
+
+    def test_lookup_uses_precompiled_registry(self, monkeypatch):
+        """Test that lookups go through the registry pattern once per filename."""
+        calls = []
+        registry_re = citation._REGISTRY_RE
+
+        class SpyPattern:
+            def match(self, filename):
+                calls.append(filename)
+                return registry_re.match(filename)
+
+        monkeypatch.setattr(citation, "_REGISTRY_RE", SpyPattern())
+        citation._lookup_citation_cached.cache_clear()
+
+        assert lookup_citation("cohn chapter 1")["author"] == "Cohn, M."
+        assert lookup_citation("cohn chapter 1")["author"] == "Cohn, M."
+        assert calls == ["cohn chapter 1"]
+        assert citation._lookup_citation_cached.cache_info().hits == 1
+        # Drop memoised results that went through the spy
+        citation._lookup_citation_cached.cache_clear()
+
+
+class TestEnrichMetadata:
+    """Test metadata enrichment from the registry."""
+
+    def test_enrich_fills_missing_keys(self):
+        """Test that registry values fill missing or None keys."""
+        metadata = {"title": None, "category": "lecture"}
+        enriched = enrich_metadata(metadata, "Becker et al - Requirements.pdf")
+
+        assert enriched["title"] == "Requirements: The key to sustainability"
+        assert enriched["journal"] == "IEEE Software"
+        assert enriched["category"] == "lecture"
+
+    def test_enrich_keeps_explicit_values(self):
+        """Test that explicit metadata takes precedence over the registry."""
+        metadata = {"year": 2020}
+        enriched = enrich_metadata(metadata, "sommerville chapter 1")
+
+        assert enriched["year"] == 2020
+        assert enriched["author"] == "Sommerville, I."
+
+    def test_enrich_no_match(self):
+        """Test that unmatched filenames leave metadata untouched."""
+        metadata = {"title": "Notes"}
+        assert enrich_metadata(metadata, "notes.txt") == {"title": "Notes"}
+
+
+class TestApaFormatting:
+    """Test APA 7 in-text and reference-list formatting."""
+
+    @pytest.mark.parametrize("metadata, expected", [
+        pytest.param(
+            lookup_citation("sommerville chapter 1"),
+            "Sommerville, I. (2015). *Software Engineering* (10th ed.). "
+            "Pearson Education. ISBN: 9781292096131.",
+            id="book",
+        ),
+        pytest.param(
+            {**lookup_citation("Meyer 2018"), "doi": "10.1109/MS.2018.1661325"},
+            "Meyer, B. (2018). Making sense of agile methods. "
+            "*IEEE Software*, *35*(2), 91-94. https://doi.org/10.1109/MS.2018.1661325",
+            id="journal",
+        ),
+        pytest.param(
+            {"publication_type": "other"},
+            "Unknown (n.d.). *Untitled*.",
+            id="unknown-type-defaults",
+        ),
+    ])
+    def test_format_reference(self, metadata, expected):
+        """Test book, journal and fallback reference-list entries."""
+        assert format_apa_reference(metadata) == expected
+
+    def test_format_inline_two_authors(self):
+        """Test in-text citation with chapter and page."""
+        metadata = lookup_citation("crispin gregory chapter 6")
+        metadata["page_number"] = 12
+
+        assert format_apa_inline(metadata) == "(Crispin & Gregory, 2008, Ch. 6, p. 12)"
+
+    def test_build_citation_key_et_al(self):
+        """Test that three or more authors collapse to et al."""
+        metadata = lookup_citation("Becker 2016")
+        assert build_citation_key(metadata) == "Becker et al., 2016"
+
+    def test_build_citation_key_without_author(self):
+        """Test that the title is used when no author is known."""
+        assert build_citation_key({"title": "Lecture 3", "year": 2024}) == "Lecture 3, 2024"
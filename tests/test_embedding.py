@@ -4,27 +4,46 @@ Tests for the embedding service functionality.
 
 import pytest
 import asyncio
+from dataclasses import dataclass
+from typing import Optional
 from unittest.mock import Mock, patch, AsyncMock
-from core.services.embedding_service import EmbeddingService, EmbeddingResult, EmbeddingCache
-from core.config import Settings
+from core.services.embedding_service import (
+    EmbeddingService,
+    EmbeddingResult,
+    EmbeddingCache,
+    PersistentEmbeddingCache,
+    AIMD_ADDITIVE_INCREASE,
+)
+
+
+@dataclass(frozen=True)
+class _FakeSettings:
+    """The Settings fields EmbeddingService reads, as plain attributes.
+    
+    Cheaper to build and read than a Mock, and a typo'd or newly read
+    field fails loudly instead of returning a child Mock.
+    """
+    openai_api_key: str = "test-api-key"
+    embedding_model: str = "text-embedding-3-small"
+    max_tokens_per_chunk: int = 8192
+    chunk_overlap_tokens: int = 200
+    batch_size: int = 100
+    max_concurrent_embeddings: int = 4
+    embedding_rpm_limit: int = 3000
+    embedding_tpm_limit: int = 1_000_000
+    embedding_cache_path: Optional[str] = None
 
 
 @pytest.fixture
 def mock_settings():
     """Create mock settings for testing."""
-    settings = Mock(spec=Settings)
-    settings.openai_api_key = "test-api-key"
-    settings.embedding_model = "text-embedding-3-small"
-    settings.max_tokens_per_chunk = 8192
-    settings.chunk_overlap_tokens = 200
-    settings.batch_size = 100
-    return settings
+    return _FakeSettings()
 
 
 @pytest.fixture
 def embedding_service(mock_settings):
     """Create embedding service for testing."""
-    with patch('core.services.embedding_service.openai.OpenAI'):
+    with patch('core.services.embedding_service.openai.AsyncOpenAI'):
         service = EmbeddingService(mock_settings, enable_cache=False)
         return service
 
@@ -32,7 +51,7 @@ def embedding_service(mock_settings):
 @pytest.fixture
 def embedding_service_with_cache(mock_settings):
     """Create embedding service with cache for testing."""
-    with patch('core.services.embedding_service.openai.OpenAI'):
+    with patch('core.services.embedding_service.openai.AsyncOpenAI'):
         service = EmbeddingService(mock_settings, enable_cache=True)
         return service
 
@@ -51,7 +70,7 @@ class TestEmbeddingCache:
         cache = EmbeddingCache()
         
         result = EmbeddingResult(
-            embedding=[0.1, 0.2, 0.3],
+            embedding=[0.5, 0.25, 0.125],
             token_count=10,
             processing_time=0.1,
             text_hash="test_hash",
@@ -64,9 +83,18 @@ class TestEmbeddingCache:
         # Get cache entry
         cached_result = cache.get("test_hash")
         assert cached_result is not None
-        assert cached_result.embedding == [0.1, 0.2, 0.3]
+        assert cached_result.embedding == [0.5, 0.25, 0.125]
         assert cached_result.cached is True
     
+    def test_cache_stores_float32(self):
+        """Test that cached vectors are held compactly and returned as lists."""
+        cache = EmbeddingCache()
+        cache.set("hash1", EmbeddingResult([0.1, 0.2], 10, 0.1, "hash1", "model"))
+        
+        stored, _ = cache.cache["hash1"]
+        assert stored.embedding.typecode == "f"
+        assert cache.get("hash1").embedding == pytest.approx([0.1, 0.2])
+    
     def test_cache_miss(self):
         """Test cache miss."""
         cache = EmbeddingCache()
@@ -89,6 +117,87 @@ class TestEmbeddingCache:
         assert cache.get("hash1") is None
         assert cache.get("hash2") is not None
         assert cache.get("hash3") is not None
+    
+    def test_cache_evicts_least_recently_used(self):
+        """Test that a cache hit protects an entry from eviction."""
+        cache = EmbeddingCache(max_size=2)
+        
+        cache.set("hash1", EmbeddingResult([0.1], 10, 0.1, "hash1", "model"))
+        cache.set("hash2", EmbeddingResult([0.2], 10, 0.1, "hash2", "model"))
+        cache.get("hash1")  # hash2 is now least recently used
+        cache.set("hash3", EmbeddingResult([0.3], 10, 0.1, "hash3", "model"))
+        
+        assert cache.get("hash1") is not None
+        assert cache.get("hash2") is None
+        assert cache.get("hash3") is not None
+    
+    def test_cache_expiry(self):
+        """Test that expired entries are missed and swept."""
+        cache = EmbeddingCache(ttl_hours=0)
+        
+        cache.set("hash1", EmbeddingResult([0.1], 10, 0.1, "hash1", "model"))
+        cache.set("hash2", EmbeddingResult([0.2], 10, 0.1, "hash2", "model"))
+        
+        assert cache.get("hash1") is None
+        assert cache.sweep_expired() == 1
+        assert len(cache.cache) == 0
+
+
+class TestPersistentEmbeddingCache:
+    """Test the SQLite-backed embedding cache."""
+    
+    def test_survives_reopen(self, tmp_path):
+        """Test that entries are read back after reopening the database."""
+        path = tmp_path / "cache.sqlite"
+        cache = PersistentEmbeddingCache(path)
+        cache.set("hash1", EmbeddingResult([0.5, -0.25], 7, 0.1, "hash1", "model"))
+        cache.close()
+        
+        reopened = PersistentEmbeddingCache(path)
+        result = reopened.get("hash1")
+        
+        assert result is not None
+        assert result.embedding == [0.5, -0.25]
+        assert result.token_count == 7
+        assert result.model_used == "model"
+        assert result.cached is True
+        assert reopened.get_stats()["size"] == 1
+        reopened.close()
+    
+    def test_expired_entries(self, tmp_path):
+        """Test that expired entries are missed and swept."""
+        cache = PersistentEmbeddingCache(tmp_path / "cache.sqlite", ttl_hours=0)
+        cache.set("hash1", EmbeddingResult([0.1], 1, 0.1, "hash1", "model"))
+        
+        assert cache.get("hash1") is None
+        assert cache.sweep_expired() == 1
+        cache.close()
+
+    def test_get_many_and_set_many(self, tmp_path):
+        """Test bulk writes and lookups across several IN queries."""
+        cache = PersistentEmbeddingCache(tmp_path / "cache.sqlite")
+        results = [
+            EmbeddingResult([float(i)], 1, 0.1, f"hash{i}", "model")
+            for i in range(600)
+        ]
+        cache.set_many(results)
+
+        found = cache.get_many([f"hash{i}" for i in range(0, 700, 50)])
+
+        assert sorted(found) == sorted(f"hash{i}" for i in range(0, 600, 50))
+        assert found["hash550"].embedding == [550.0]
+        assert found["hash550"].cached is True
+        cache.close()
+
+    def test_float16_storage(self, tmp_path):
+        """Test that vectors are stored as float16 blobs."""
+        cache = PersistentEmbeddingCache(tmp_path / "cache.sqlite")
+        cache.set("hash1", EmbeddingResult([0.25, -0.1], 1, 0.1, "hash1", "model"))
+        
+        assert cache.get("hash1").embedding == pytest.approx([0.25, -0.1], abs=1e-3)
+        (blob,) = cache.conn.execute("SELECT embedding FROM embeddings").fetchone()
+        assert len(blob) == 2 * 2
+        cache.close()
 
 
 class TestEmbeddingService:
@@ -135,21 +244,123 @@ class TestEmbeddingService:
         assert batches[1] == ["text3", "text4"]
         assert batches[2] == ["text5"]
     
+    def test_create_token_batches(self, embedding_service):
+        """Test that batches also respect the per-request token budget."""
+        texts = ["a", "b", "c", "d"]
+        token_counts = [200_000, 90_000, 20_000, 10]
+        batches = embedding_service._create_token_batches(texts, token_counts, batch_size=100)
+        
+        assert batches == [
+            (["a", "b"], [200_000, 90_000]),
+            (["c", "d"], [20_000, 10]),
+        ]
+    
+    def test_adapt_batch_size(self, embedding_service):
+        """Test latency-driven AIMD adjustments after successful requests."""
+        size = embedding_service.effective_batch_size
+        
+        # Small batch: no headroom to justify growing the limit
+        embedding_service._adapt_batch_size(size // 4, latency_per_text=0.001)
+        assert embedding_service.effective_batch_size == size
+        
+        # Full, fast batch during slow start: doubles
+        embedding_service._adapt_batch_size(size, latency_per_text=0.001)
+        assert embedding_service.effective_batch_size == size * 2
+        
+        # Slow window: multiplicative decrease, which ends slow start
+        grown = embedding_service.effective_batch_size
+        embedding_service._adapt_batch_size(grown, latency_per_text=10.0)
+        reduced = embedding_service.effective_batch_size
+        assert reduced < grown
+        
+        # Afterwards growth is additive
+        embedding_service._adapt_batch_size(reduced, latency_per_text=0.001)
+        assert embedding_service.effective_batch_size == reduced + AIMD_ADDITIVE_INCREASE
+    
+    @pytest.mark.asyncio
+    async def test_acquire_rate_limit(self, embedding_service):
+        """Test that a full request window blocks until the oldest entry expires."""
+        embedding_service.rpm_limit = 1
+        await embedding_service._acquire_rate_limit(10)
+        assert embedding_service._window_tokens == 10
+        
+        async def expire_window(delay):
+            embedding_service._request_times[0] -= 60.0
+            embedding_service._token_times[0] = (embedding_service._request_times[0], 10)
+        
+        with patch('core.services.embedding_service.asyncio.sleep', side_effect=expire_window) as mock_sleep:
+            await embedding_service._acquire_rate_limit(20)
+        
+        assert mock_sleep.call_count == 1
+        assert 0 < mock_sleep.call_args[0][0] <= 60.0
+        assert len(embedding_service._request_times) == 1
+        assert embedding_service._window_tokens == 20
+    
+    @pytest.mark.parametrize("headers, expected", [
+        ({"retry-after-ms": "1500"}, 1.5),
+        ({"retry-after": "2"}, 2.0),
+        ({"x-ratelimit-reset-requests": "250ms", "x-ratelimit-reset-tokens": "1m30s"}, 90.0),
+        ({}, None),
+    ])
+    def test_retry_after_from_headers(self, embedding_service, headers, expected):
+        """Test reading the rate-limit wait from response headers."""
+        error = Exception("rate limited")
+        error.response = Mock(headers=headers)
+        assert embedding_service._retry_after_from_headers(error) == expected
+    
     def test_chunk_text(self, embedding_service):
         """Test text chunking."""
         # Mock the encoding
-        with patch.object(embedding_service.encoding, 'encode') as mock_encode, \
-             patch.object(embedding_service.encoding, 'decode') as mock_decode:
+        with patch.object(embedding_service.encoding, 'encode_ordinary') as mock_encode, \
+             patch.object(embedding_service.encoding, 'decode_batch') as mock_decode_batch:
             
             # Simulate a text that needs chunking
             mock_encode.return_value = list(range(1000))  # 1000 tokens
-            mock_decode.side_effect = lambda tokens: f"chunk_{len(tokens)}"
+            mock_decode_batch.side_effect = lambda batch, **kwargs: [f"chunk_{len(tokens)}" for tokens in batch]
             
-            chunks = embedding_service.chunk_text("long text", chunk_size=500, overlap=100)
+            chunks = embedding_service.chunk_text("long text " * 100, chunk_size=500, overlap=100)
             
+            mock_encode.assert_called_once_with("long text " * 100)
             assert len(chunks) > 1
             assert all(chunk.startswith("chunk_") for chunk in chunks)
     
+    def test_chunk_texts(self, embedding_service):
+        """Test that several texts are chunked with one tokenizer pass."""
+        with patch.object(embedding_service.encoding, 'encode_ordinary_batch') as mock_encode, \
+             patch.object(embedding_service.encoding, 'decode_batch') as mock_decode_batch:
+            
+            mock_encode.return_value = [list(range(1000)), list(range(10))]
+            mock_decode_batch.side_effect = lambda batch, **kwargs: [f"chunk_{tokens[0]}" for tokens in batch]
+            
+            long_text = "long text " * 100
+            few_tokens = "ünïcödé " * 100
+            chunked = embedding_service.chunk_texts(
+                [long_text, "short text", few_tokens, ""], chunk_size=500, overlap=100
+            )
+            
+            # Texts of at most chunk_size bytes are never tokenized
+            mock_encode.assert_called_once()
+            assert mock_encode.call_args.args[0] == [long_text, few_tokens]
+            assert mock_decode_batch.call_count == 1
+            assert chunked == [["chunk_0", "chunk_400", "chunk_800"], ["short text"], [few_tokens], []]
+    
+    @pytest.mark.parametrize("length,chunk_size,overlap,expected_starts", [
+        (0, 500, 100, []),
+        (500, 500, 100, [0]),
+        (901, 500, 100, [0, 400, 800]),
+        (1000, 500, 100, [0, 400, 800]),
+        (5, 3, 3, [0, 1, 2]),
+    ])
+    def test_token_windows(self, length, chunk_size, overlap, expected_starts):
+        """Test window boundaries, including overlaps as large as the window."""
+        tokens = list(range(length))
+        windows = EmbeddingService._token_windows(tokens, chunk_size, overlap)
+        
+        assert [window[0] for window in windows] == expected_starts
+        assert all(len(window) <= chunk_size for window in windows)
+        if windows:
+            assert windows[-1][-1] == length - 1
+    
     @pytest.mark.asyncio
     async def test_create_embeddings_batch_mock(self, embedding_service):
         """Test batch embedding creation with mocked API."""
@@ -162,12 +373,14 @@ class TestEmbeddingService:
             Mock(embedding=[0.4, 0.5, 0.6])
         ]
         
-        with patch.object(embedding_service.client.embeddings, 'create', return_value=mock_response):
+        with patch.object(embedding_service.client.embeddings, 'create', new_callable=AsyncMock, return_value=mock_response):
             results = await embedding_service.create_embeddings_batch(texts)
             
             assert len(results) == 2
             assert results[0].embedding == [0.1, 0.2, 0.3]
             assert results[1].embedding == [0.4, 0.5, 0.6]
+            assert results[0].token_count == len(embedding_service.encoding.encode("text1"))
+            assert results[1].text_hash == embedding_service._hash_text("text2")
             assert all(not result.cached for result in results)
     
     @pytest.mark.asyncio
@@ -179,7 +392,7 @@ class TestEmbeddingService:
         mock_response = Mock()
         mock_response.data = [Mock(embedding=[0.1, 0.2, 0.3])]
         
-        with patch.object(embedding_service_with_cache.client.embeddings, 'create', return_value=mock_response) as mock_create:
+        with patch.object(embedding_service_with_cache.client.embeddings, 'create', new_callable=AsyncMock, return_value=mock_response) as mock_create:
             # First call should hit the API
             results1 = await embedding_service_with_cache.create_embeddings_batch(texts)
             assert mock_create.call_count == 1
@@ -190,12 +403,31 @@ class TestEmbeddingService:
             assert mock_create.call_count == 1  # No additional API calls
             assert results2[0].cached
     
+    @pytest.mark.asyncio
+    async def test_duplicate_texts_embedded_once(self, embedding_service):
+        """Test that repeated texts in one call are sent to the API once."""
+        texts = ["header", "body", "header"]
+        
+        mock_response = Mock()
+        mock_response.data = [
+            Mock(embedding=[0.1, 0.2]),
+            Mock(embedding=[0.3, 0.4])
+        ]
+        
+        with patch.object(embedding_service.client.embeddings, 'create', new_callable=AsyncMock, return_value=mock_response) as mock_create:
+            results = await embedding_service.create_embeddings_batch(texts)
+            
+            assert mock_create.call_args.kwargs["input"] == ["header", "body"]
+            assert [r.embedding for r in results] == [[0.1, 0.2], [0.3, 0.4], [0.1, 0.2]]
+            assert not results[0].cached
+            assert results[2].cached
+    
     def test_estimate_cost(self, embedding_service):
         """Test cost estimation."""
         texts = ["short text", "another short text"]
         
-        with patch.object(embedding_service.encoding, 'encode') as mock_encode:
-            mock_encode.side_effect = [
+        with patch.object(embedding_service.encoding, 'encode_ordinary_batch') as mock_encode:
+            mock_encode.return_value = [
                 list(range(100)),  # 100 tokens
                 list(range(150))   # 150 tokens
             ]
@@ -222,7 +454,7 @@ class TestEmbeddingService:
             Mock(embedding=[0.7, 0.8, 0.9])
         ]
         
-        with patch.object(embedding_service.client.embeddings, 'create') as mock_create, \
+        with patch.object(embedding_service.client.embeddings, 'create', new_callable=AsyncMock) as mock_create, \
              patch.object(embedding_service, 'chunk_text', return_value=["chunk1", "chunk2"]):
             
             mock_create.side_effect = [mock_main_response, mock_chunk_response]
@@ -234,6 +466,30 @@ class TestEmbeddingService:
             assert chunk_embeddings[0].embedding == [0.4, 0.5, 0.6]
             assert chunk_embeddings[1].embedding == [0.7, 0.8, 0.9]
 
+    @pytest.mark.asyncio
+    async def test_embed_documents_with_chunks(self, embedding_service):
+        """Test that several documents are embedded in one batch call."""
+        mock_response = Mock()
+        mock_response.data = [
+            Mock(embedding=[0.1, 0.2]),
+            Mock(embedding=[0.3, 0.4]),
+            Mock(embedding=[0.5, 0.6])
+        ]
+
+        with patch.object(embedding_service.client.embeddings, 'create', new_callable=AsyncMock, return_value=mock_response) as mock_create, \
+             patch.object(embedding_service, 'chunk_text', side_effect=[["short doc"], ["chunk1", "chunk2"]]):
+
+            results = await embedding_service.embed_documents_with_chunks(["short doc", "long doc"])
+
+            assert mock_create.call_count == 1
+            assert mock_create.call_args.kwargs["input"] == ["short doc", "chunk1", "chunk2"]
+            main_embedding, chunk_embeddings = results[0]
+            assert main_embedding.embedding == [0.1, 0.2]
+            assert chunk_embeddings == []
+            main_embedding, chunk_embeddings = results[1]
+            assert main_embedding.embedding == [0.3, 0.4]
+            assert [c.embedding for c in chunk_embeddings] == [[0.3, 0.4], [0.5, 0.6]]
+
 
 if __name__ == "__main__":
     pytest.main([__file__])
@@ -0,0 +1,59 @@
+"""
+Tests for the ingestion script's filename heuristics.
+"""
+
+import pytest
+
+# The ingestion script imports PyMuPDF at module level
+pytest.importorskip("fitz")
+
+from scripts import ingest_all_documents
+from scripts.ingest_all_documents import _guess_category, _guess_tags
+
+
+class TestGuessTags:
+    """Test tag guessing from filenames."""
+
+    def test_tags_in_table_order(self):
+        """Test that every keyword found is reported, in table order."""
+        tags = _guess_tags("Kanban and Scrum - Agile Testing Chapter 3.pdf")
+        assert tags == ["agile", "scrum", "kanban", "testing", "textbook-chapter"]
+
+    def test_no_keywords(self):
+        """Test the fallback tag for filenames without keywords."""
+        assert _guess_tags("notes.pdf") == ["document"]
+
+    def test_overlapping_keywords(self, monkeypatch):
+        """Test that overlapping and prefix keywords all match."""
+        monkeypatch.setattr(ingest_all_documents, "_TAG_KEYWORDS", {
+            "test": "testing",
+            "testing": "test-practice",
+            "stor": "stories",
+            "user stor": "user-stories",
+            "agile": "agile",
+            "ile": "files",
+        })
+        tags = _guess_tags("agile user stories and testing.pdf")
+        assert tags == [
+            "testing", "test-practice", "stories", "user-stories", "agile", "files",
+        ]
+
+    def test_shared_tag_reported_once(self, monkeypatch):
+        """Test that keywords mapping to the same tag yield it once."""
+        monkeypatch.setattr(ingest_all_documents, "_TAG_KEYWORDS", {
+            "test": "testing", "testing": "testing",
+        })
+        assert _guess_tags("testing.pdf") == ["testing"]
+
+
+class TestGuessCategory:
+    """Test category guessing from filenames."""
+
+    def test_first_match_wins(self):
+        """Test that the first matching category is chosen."""
+        assert _guess_category("Agile Testing.pdf") == "agile-methodologies"
+        assert _guess_category("Sommerville.pdf") == "software-engineering"
+
+    def test_no_match(self):
+        """Test the fallback category."""
+        assert _guess_category("notes.pdf") == "general"
@@ -0,0 +1,109 @@
+"""
+Tests for the PDF metadata extractor's parsing utilities.
+"""
+
+import pytest
+from datetime import datetime
+
+# core.parsers.pdf imports PyMuPDF at module level
+fitz = pytest.importorskip("fitz")
+
+from core.parsers.pdf import PDFMetadataExtractor
+
+
+class TestParsePdfDate:
+    """Test PDF date string parsing."""
+
+    def test_full_timestamp(self):
+        """Test a complete D:YYYYMMDDHHmmSS date with timezone suffix."""
+        parsed = PDFMetadataExtractor._parse_pdf_date("D:20150304120530+01'00'")
+        assert parsed == datetime(2015, 3, 4, 12, 5, 30)
+
+    def test_partial_timestamp(self):
+        """Test that missing fields fall back to their defaults."""
+        assert PDFMetadataExtractor._parse_pdf_date("D:2015") == datetime(2015, 1, 1)
+        assert PDFMetadataExtractor._parse_pdf_date("D:201507") == datetime(2015, 7, 1)
+        # A dangling single digit is not a field
+        assert PDFMetadataExtractor._parse_pdf_date("D:2015073") == datetime(2015, 7, 1)
+
+    def test_invalid_components(self):
+        """Test that out-of-range components return None."""
+        assert PDFMetadataExtractor._parse_pdf_date("D:20151340") is None
+
+    def test_iso_fallback(self):
+        """Test that ISO dates without the D: prefix are accepted."""
+        assert PDFMetadataExtractor._parse_pdf_date("2020-05-17") == datetime(2020, 5, 17)
+
+    def test_unparseable(self):
+        """Test that empty and malformed values return None."""
+        assert PDFMetadataExtractor._parse_pdf_date(None) is None
+        assert PDFMetadataExtractor._parse_pdf_date("") is None
+        assert PDFMetadataExtractor._parse_pdf_date("D:15") is None
+        assert PDFMetadataExtractor._parse_pdf_date("yesterday") is None
+
+
+class TestTextNormalisation:
+    """Test text cleanup helpers."""
+
+    @pytest.mark.parametrize("text, expected", [
+        ("a\n\nb", "a\n\nb"),
+        ("a\n\n\nb", "a\n\nb"),
+        ("a\n\n\n\n\n\nb\n\n\nc", "a\n\nb\n\nc"),
+        ("\n\n\n", "\n\n"),
+        ("no newlines", "no newlines"),
+    ])
+    def test_collapse_newlines(self, text, expected):
+        """Test collapsing runs of three or more newlines."""
+        assert PDFMetadataExtractor._collapse_newlines(text) == expected
+
+    def test_join_pages(self):
+        """Test joining pages and normalising form feeds."""
+        joined = PDFMetadataExtractor._join_pages(["  Page one\f\n", "\n\nPage two  "])
+        assert joined == "Page one\n\nPage two"
+
+    def test_parse_keywords(self):
+        """Test splitting keywords on commas and semicolons."""
+        assert PDFMetadataExtractor._parse_keywords("agile; scrum,, kanban ;") == [
+            "agile", "scrum", "kanban"
+        ]
+        assert PDFMetadataExtractor._parse_keywords(None) == []
+
+    @pytest.mark.parametrize("value, expected", [
+        ("  Title  ", "Title"),
+        ("   ", None),
+        ("", None),
+        (None, None),
+        (1.7, "1.7"),
+    ])
+    def test_clean_str(self, value, expected):
+        """Test cleaning metadata values to stripped strings or None."""
+        assert PDFMetadataExtractor._clean_str(value) == expected
+
+
+class TestPageLabels:
+    """Test page label extraction."""
+
+    def test_labelled_pdf(self):
+        """Test roman, decimal and prefixed label ranges and the page cap."""
+        doc = fitz.open()
+        for _ in range(7):
+            doc.new_page()
+        doc.set_page_labels([
+            {"startpage": 0, "prefix": "", "style": "r", "firstpagenum": 1},
+            {"startpage": 2, "prefix": "", "style": "D", "firstpagenum": 1},
+            {"startpage": 5, "prefix": "A-", "style": "D", "firstpagenum": 1},
+        ])
+
+        labels = PDFMetadataExtractor._page_labels(doc, 6)
+
+        assert labels == ["i", "ii", "1", "2", "3", "A-1"]
+        doc.close()
+
+    def test_unlabelled_pdf(self):
+        """Test that documents without label rules yield no labels."""
+        doc = fitz.open()
+        doc.new_page()
+
+        assert PDFMetadataExtractor._page_labels(doc, 1) == []
+        doc.close()
+